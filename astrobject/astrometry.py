@@ -27,7 +27,7 @@ from .utils import shape
 def wcs(filename=None, header=None, extension=0):
     """ loads the WCS solution for the given data. """
     
-    if filename is not None:
+    if filename is not None and header is None:
         header = fits.getheader(filename,ext=extension)
     if header is None:
         raise ValueError("'filename' or 'header' must be given")
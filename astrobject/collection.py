@@ -3,6 +3,9 @@
 
 
 """This module contain the collection of astrobject"""
+import os
+import mmap
+import tempfile
 import numpy as np
 import warnings
 from astropy import coordinates, table, units
@@ -11,7 +14,7 @@ import matplotlib.pyplot as mpl
 from .baseobject import BaseObject, TargetHandler, CatalogueHandler
 from .photometry import get_photopoint, Image
 from .instruments import instrument as inst
-from .utils.tools import kwargs_update, load_pkl, dump_pkl
+from .utils.tools import kwargs_update, load_pkl, dump_pkl, radec_to_xyz, LRUCache
 from .utils.shape import draw_polygon, HAS_SHAPELY
 
 __all__ = ["ImageCollection"]
@@ -22,6 +25,167 @@ def get_imagecollection(images,**kwargs):
     """ Create an Image collection from the given list of images """
     return ImageCollection(images=images,**kwargs)
 
+def _image_nbytes_(image):
+    """ size (in bytes) of the arrays held by the given image: its properties,
+    its sep background model and the (loaded) data of its fits file.
+    The arrays are counted once per buffer (views are not counted twice) and
+    the file-backed memmaps are not counted. """
+    arrays = [v for prop in [image._properties, image._side_properties,
+                             image._derived_properties] for v in prop.values()]
+    if hasattr(image, "_sepbackground"):
+        arrays += [image._sepbackground.back(), image._sepbackground.rms()]
+    fits = image._derived_properties.get("fits", None)
+    if fits is not None:
+        # - only the hdu data already read (not triggering the reading)
+        arrays += [hdu.__dict__["data"] for hdu in fits if "data" in hdu.__dict__]
+        
+    buffers = {}
+    for array in arrays:
+        if not isinstance(array, np.ndarray):
+            continue
+        while isinstance(array.base, np.ndarray):
+            array = array.base
+        if isinstance(array, np.memmap) or isinstance(array.base, mmap.mmap):
+            continue
+        buffers[id(array)] = array.nbytes
+    return np.sum(buffers.values())
+
+# ========================== #
+#  Batch processing          #
+# ========================== #
+# catalogue shared by the images processed by a batch worker (see ImageCollection.run_batch)
+_BATCH_CATALOGUE_ = None
+
+def _init_batch_worker_(catalogue):
+    """ set the catalogue of the batch worker """
+    global _BATCH_CATALOGUE_
+    _BATCH_CATALOGUE_ = catalogue
+    
+def _run_batch_image_(args):
+    """ load -> background -> sep extraction (and catalogue matching)
+    -> aperture photometry of one image (see ImageCollection.run_batch).
+    Any error is caught and recorded in the returned dict.
+    """
+    id_, filename, instrument, prop = args
+    out = {"id":id_, "instrument":instrument, "bandname":"", "mjd":np.NaN,
+           "nsources":-1, "nmatched":-1, "photometry":None, "error":""}
+    try:
+        if filename is None:
+            raise IOError("the image is not attached to a file")
+        image = inst.get_instrument(filename, instrument=instrument, **prop["loadprop"])
+        out.update(bandname=image.bandname if image.bandname is not None else "",
+                   mjd=image.mjd if image.mjd is not None else np.NaN)
+        if _BATCH_CATALOGUE_ is not None:
+            image.set_catalogue(_BATCH_CATALOGUE_.get_view())
+        if prop["background"]:
+            image.get_sep_background()
+        if prop["sep_extract"]:
+            image.sep_extract(match_catalogue=prop["match_catalogue"], **prop["extractprop"])
+            out["nsources"] = image.sepobjects.nsources if image.has_sepobjects() else 0
+            if image.has_sepobjects() and image.sepobjects.has_catmatch():
+                out["nmatched"] = len(image.sepobjects.catmatch["idx"])
+        if prop["radius"] is not None:
+            out["photometry"] = _get_batch_photometry_(image, prop)
+    except Exception as e:
+        import traceback
+        out["error"] = "%s: %s"%(e.__class__.__name__, e)
+        if prop["verbose"]:
+            print traceback.format_exc()
+    return out
+
+def _get_batch_photometry_(image, prop):
+    """ columnar aperture photometry of the batch positions within the image """
+    if prop["positions"] == "catalogue":
+        if not image.has_catalogue():
+            return None
+        ra, dec = np.asarray(image.catalogue.ra), np.asarray(image.catalogue.dec)
+        idx = np.argwhere(image.catalogue.fovmask).ravel()
+    else:
+        ra, dec = prop["positions"]
+        idx = np.arange(len(ra))
+        
+    x, y = np.asarray(image.coords_to_pixel(ra, dec)).reshape(-1,2).T
+    inimage = (x>=-0.5) & (x<image.width-0.5) & (y>=-0.5) & (y<image.height-0.5)
+    count, err, flag = image.get_aperture(x[inimage], y[inimage], radius=prop["radius"],
+                                          runits=prop["runits"], **prop["apertureprop"])
+    photometry = {"idx":idx[inimage], "ra":ra[inimage], "dec":dec[inimage],
+                  "x":x[inimage], "y":y[inimage],
+                  "count":count, "count_err":err, "flag":flag}
+    if hasattr(image, "count_to_flux"):
+        photometry["flux"] = image.count_to_flux(count)
+        photometry["flux_err"] = image.count_to_flux(err)
+    return photometry
+
+def _map_in_bounded_pool_(func, args, nprocess=None, maxinflight=None,
+                          initializer=None, initargs=(), threads=False):
+    """ map the function on the list of arguments using a pool of nprocess processes
+    (threads if threads) keeping at most maxinflight (default 2*nprocess) tasks
+    submitted but not collected.
+    The results are in the order of args. An exception raised while collecting
+    a result is returned in place of the result.
+    """
+    from multiprocessing import cpu_count
+    if threads:
+        from multiprocessing.pool import ThreadPool as Pool
+    else:
+        from multiprocessing import Pool
+    nprocess = cpu_count() if nprocess is None else nprocess
+    maxinflight = 2*nprocess if maxinflight is None else maxinflight
+    
+    def collect(asyncresult):
+        try:
+            return asyncresult.get()
+        except Exception as e:
+            return e
+        
+    pool = Pool(nprocess, initializer=initializer, initargs=initargs)
+    results, inflight = [], []
+    try:
+        for arg in args:
+            if len(inflight) >= maxinflight:
+                results.append(collect(inflight.pop(0)))
+            inflight.append(pool.apply_async(func, (arg,)))
+        results += [collect(r_) for r_ in inflight]
+    finally:
+        pool.close()
+        pool.join()
+    return results
+
+# ========================== #
+#  Catalogue prefetch        #
+# ========================== #
+def _fetch_cone_catalogue_(args):
+    """ catalogue of the given cone (see ImageCollection.prefetch_catalogue) """
+    fetcher, source, ra, dec, radius, kwargs = args
+    return fetcher(source=source, radec="%f %f"%(ra, dec),
+                   radius="%fd"%radius, **kwargs)
+
+def _merge_cones_(xyz1, radius1, xyz2, radius2):
+    """ smallest cone (unit vector, radius in degree) containing the two given cones """
+    dist = np.arccos(np.clip(np.dot(xyz1, xyz2), -1, 1))*180/np.pi
+    if dist + radius2 <= radius1:
+        return xyz1, radius1
+    if dist + radius1 <= radius2:
+        return xyz2, radius2
+    radius = (dist + radius1 + radius2) / 2.
+    # - center moved from xyz1 toward xyz2 along the great circle
+    step, dist = (radius - radius1)*np.pi/180, dist*np.pi/180
+    return (np.sin(dist-step)*xyz1 + np.sin(step)*xyz2) / np.sin(dist), radius
+
+def _group_cones_(xyz, radius, maxradius):
+    """ greedy grouping of the given cones into cones of at most maxradius (degree).
+    Returns the list of [center (unit vector), radius, index of the grouped cones] """
+    groups = []
+    for i in np.argsort(radius)[::-1]:
+        merged = [_merge_cones_(g_[0], g_[1], xyz[i], radius[i]) for g_ in groups]
+        best = None if len(merged) == 0 else np.argmin([r_ for c_,r_ in merged])
+        if best is not None and merged[best][1] <= maxradius:
+            groups[best][0], groups[best][1] = merged[best]
+            groups[best][2].append(i)
+        else:
+            groups.append([xyz[i], radius[i], [i]])
+    return groups
+
 
 #######################################
 #                                     #
@@ -185,8 +349,8 @@ class ImageCollection( Collection, CatalogueHandler ):
     """
     """
     PROPERTIES         = []
-    SIDE_PROPERTIES    = ["hostcollection"]
-    DERIVED_PROPERTIES = []
+    SIDE_PROPERTIES    = ["hostcollection","imagebudget"]
+    DERIVED_PROPERTIES = ["footprintindex","loadedimages"]
     
     def __init__(self, images=None, empty=False, catalogue=None, **kwargs):
         """
@@ -214,8 +378,10 @@ class ImageCollection( Collection, CatalogueHandler ):
         if imageid is None:
             imageid = [None]*len(images)
             
-        [self.add_image(i_,load_catalogue=catalogue,imageid=id_, **kwargs) for i_,id_ in zip(images, imageid) 
-         if i_ is not None]
+        ids = [self.add_image(i_,load_catalogue=False,imageid=id_, **kwargs) for i_,id_ in zip(images, imageid) 
+               if i_ is not None]
+        if catalogue is not False:
+            self.prefetch_catalogue(ids)
 
     def set_target(self,newtarget, set_to_images=True):
         """
@@ -237,6 +403,19 @@ class ImageCollection( Collection, CatalogueHandler ):
                     except ValueError:
                         warnings.warn("the new target is not in %s's FoV "%id_)
         
+    def remove(self,id):
+        """ remove the given image from the current instance """
+        super(ImageCollection,self).remove(id)
+        self._derived_properties["footprintindex"] = None
+        if self._loadedimages is not None:
+            self._loadedimages.pop(id)
+
+    def rename(self,id,newid,force_it=False):
+        """ change the id with which the image is accessed (see BaseCollection.rename) """
+        super(ImageCollection,self).rename(id,newid,force_it=force_it)
+        self._derived_properties["footprintindex"] = None
+        if self._loadedimages is not None and id in self._loadedimages:
+            self._loadedimages[newid] = self._loadedimages.pop(id)
                     
         
     # ========================= #
@@ -267,7 +446,7 @@ class ImageCollection( Collection, CatalogueHandler ):
 
         Return
         ------
-        Void
+        string (the id of the image)
         """
         # ------------------------ #
         # What should be loaded  - #
@@ -280,9 +459,65 @@ class ImageCollection( Collection, CatalogueHandler ):
         else:
             # -- Issue
             raise TypeError("the given new_image must be a image-file or an astrobject imnage")
+        self._derived_properties["footprintindex"] = None
         if load_catalogue:
             self.download_catalogue(id_=idloaded)
+        return idloaded
             
+    def add_from_index(self, fitsindex, load_catalogue=False, path_as_id=False, **kwargs):
+        """
+        Add the images recorded in a fits metadata index (see instruments.fitsindex).
+        The fits files are not opened: the instrument, bandname, mjd and wcs solution
+        come from the index. The files are only read when their pixels are needed
+        (see get_image).
+
+        Parameters
+        ----------
+        fitsindex: [FitsIndex or string]
+            The index (or its sqlite file)
+
+        load_catalogue: [bool] -optional-
+            run the 'download_catalogue' method for the added images.
+
+        path_as_id: [bool] -optional-
+            The ids of the images are their file name, unless this is True:
+            then their full path is used (e.g. for a tree with several files
+            of the same name). A ValueError is raised if an id is not unique.
+
+        **kwargs goes to the index's get_entries() to select the files
+               (instrument, bandname, mjd_range, radec)
+
+        Return
+        ------
+        list of added ids
+        """
+        from .instruments.fitsindex import FitsIndex
+        if type(fitsindex) is str:
+            fitsindex = FitsIndex(fitsindex)
+
+        entries = fitsindex.get_entries(**kwargs)
+        ids = [entry["path"] if path_as_id else entry["path"].split("/")[-1]
+               for entry in entries]
+        # -- nothing is added if an id is not unique
+        duplicates = sorted(set([ID for ID in ids if ids.count(ID) > 1 or ID in self.images]))
+        if len(duplicates) > 0:
+            raise ValueError("the following image ids are not unique (use path_as_id=True): "+
+                             ", ".join(duplicates))
+        
+        for ID, entry in zip(ids, entries):
+            self.images[ID] = {
+                "file":entry["path"],
+                "image":None,
+                "wcs":fitsindex.get_entry_wcs(entry),
+                "instrument":entry["instrument"],
+                "bandname":entry["bandname"],
+                "mjd":entry["mjd"]
+                }
+            if load_catalogue:
+                self.download_catalogue(id_=ID)
+        self._derived_properties["footprintindex"] = None
+        return ids
+    
     def set_catalogue(self, catalogue, force_it=False,
                       fast_setup=False):
         """ attach a catalogue to the current instance.
@@ -313,6 +548,167 @@ class ImageCollection( Collection, CatalogueHandler ):
         [self._load_image_(id_, **kwargs) for id_ in self.list_id
          if self.images[id_]["image"] is None]
         # - done
+
+    def run_batch(self, ids=None, nprocess=None, maxinflight=None,
+                  background=True, sep_extract=True, match_catalogue=True,
+                  radius=None, runits="arcsec", positions=None,
+                  loadprop={}, extractprop={}, apertureprop={}, verbose=False):
+        """
+        Process the images in a pool of processes. For each image: load,
+        sep background (get_sep_background), sep extraction and catalogue
+        matching (sep_extract) and aperture photometry (get_aperture).
+        The images are not kept: only compact tables come back from the workers.
+
+        Parameters
+        ----------
+        ids: [list/None] -optional-
+            ids of the images to process (all by default). Only images attached
+            to a file can be processed.
+
+        nprocess: [int/None] -optional-
+            number of processes (None means the number of cpus).
+            nprocess=1 runs in the current process (no pool).
+
+        maxinflight: [int/None] -optional-
+            maximum number of images submitted to the pool and not collected yet
+            (default 2*nprocess). This bounds the memory used by pending results.
+
+        background, sep_extract, match_catalogue: [bool] -optional-
+            steps to run. The catalogue of this instance (if any) is given to the images
+            (see get_view) once per process.
+
+        radius, runits: [float/array/None, string] -optional-
+            aperture radius (see get_aperture). None means no photometry.
+
+        positions: [None/'catalogue'/[ra, dec]] -optional-
+            where the photometry is made:
+            - None: the target of the instance.
+            - 'catalogue': the catalogue sources within the image.
+            - [ra, dec]: arrays of coordinates (degree).
+            Positions outside an image are skipped.
+
+        loadprop, extractprop, apertureprop: [dict] -optional-
+            options of get_instrument, sep_extract and get_aperture.
+
+        verbose: [bool] -optional-
+            print the traceback of the failures.
+            
+        Return
+        ------
+        dict {"images":Table, "photometry":Table}
+        - images: one row per image (id, instrument, bandname, mjd, nsources, nmatched, error)
+          where error is "" if the processing went well.
+        - photometry: one row per image and position (id, idx, ra, dec, x, y, count,
+          count_err, flag [, flux, flux_err]), idx being the index of the position
+          (or of the catalogue entry).
+        Both follow the order of ids.
+        """
+        ids = self.list_id if ids is None else ids
+        [self._test_id_(id_) for id_ in ids]
+        # ---------------
+        # - Positions
+        if radius is None:
+            positions = None
+        elif positions is None:
+            if not self.has_target():
+                raise ValueError("no target set: provide the photometry positions")
+            positions = np.atleast_1d(self.target.ra), np.atleast_1d(self.target.dec)
+        elif type(positions) is str:
+            if positions != "catalogue":
+                raise ValueError("cannot parse the given positions %s"%positions)
+        else:
+            positions = np.atleast_1d(positions[0]), np.atleast_1d(positions[1])
+            
+        prop = dict(background=background, sep_extract=sep_extract,
+                    match_catalogue=match_catalogue,
+                    radius=radius, runits=runits, positions=positions,
+                    loadprop=loadprop, extractprop=extractprop,
+                    apertureprop=apertureprop, verbose=verbose)
+        tasks = [(id_, self.images[id_]["file"], self.images[id_].get("instrument",None), prop)
+                 for id_ in ids]
+        catalogue = self.catalogue if self.has_catalogue() else None
+        # ---------------
+        # - Run
+        if nprocess == 1:
+            _init_batch_worker_(catalogue)
+            try:
+                results = [_run_batch_image_(t_) for t_ in tasks]
+            finally:
+                _init_batch_worker_(None)
+        else:
+            results = _map_in_bounded_pool_(_run_batch_image_, tasks, nprocess=nprocess,
+                                            maxinflight=maxinflight,
+                                            initializer=_init_batch_worker_,
+                                            initargs=(catalogue,))
+        # ---------------
+        # - Columnar outputs
+        imagekeys = ["id","instrument","bandname","mjd","nsources","nmatched","error"]
+        rows, photometry = [], []
+        for t_, r_ in zip(tasks, results):
+            if isinstance(r_, Exception):
+                # failure out of the worker's processing (e.g. transport)
+                r_ = {"id":t_[0], "instrument":t_[2], "bandname":"", "mjd":np.NaN,
+                      "nsources":-1, "nmatched":-1, "photometry":None,
+                      "error":"%s: %s"%(r_.__class__.__name__, r_)}
+            if r_["error"] != "":
+                warnings.warn("batch processing of %s failed (%s)"%(r_["id"], r_["error"]))
+            rows.append([r_[k] if r_[k] is not None else "" for k in imagekeys])
+            if r_["photometry"] is not None and len(r_["photometry"]["idx"])>0:
+                phot = table.Table(r_["photometry"])
+                phot.add_column(table.Column([r_["id"]]*len(phot), name="id"), index=0)
+                photometry.append(phot)
+                
+        return {"images": table.Table(rows=rows, names=imagekeys) if len(rows)>0 else
+                          table.Table(names=imagekeys),
+                "photometry": table.vstack(photometry) if len(photometry)>0 else table.Table()}
+        
+    def set_image_budget(self, nimages=None, nbytes=None,
+                         spill_sepobjects=False, spilldir=None):
+        """
+        Limit the memory used by the loaded images. Once the budget is exceeded,
+        the least recently used images are unloaded: only their file and wcs
+        information are kept and they are transparently loaded again by get_image().
+        Images added as astrobject Image without file are never unloaded.
+
+        Parameters
+        ----------
+        nimages: [int/None] -optional-
+            maximum number of loaded images. None means no limit.
+
+        nbytes: [int/None] -optional-
+            maximum size (in bytes) of the arrays of the loaded images
+            (file-backed memmaps are not counted). None means no limit.
+
+        spill_sepobjects: [bool] -optional-
+            Save on disk the sep extraction (sepoutput) of the unloaded images.
+            It is restored when the image is loaded again with the same data slicing
+            (the catalogue matching has to be done again).
+
+        spilldir: [string/None] -optional-
+            directory where the sep extractions are saved.
+            If None, a temporary directory is created when needed.
+
+        Return
+        ------
+        Void
+        """
+        self._side_properties["imagebudget"] = {"nimages":nimages, "nbytes":nbytes,
+                                                "spill_sepobjects":spill_sepobjects,
+                                                "spilldir":spilldir}
+        previous = self._loadedimages.keys() if self._loadedimages is not None else []
+        if nimages is None and nbytes is None:
+            self._derived_properties["loadedimages"] = None
+            return
+        
+        self._derived_properties["loadedimages"] = \
+          LRUCache(maxsize=nimages, maxbytes=nbytes, sizeof=_image_nbytes_,
+                   on_evict=self._unload_image_)
+        # - least recently used first
+        for id_ in [id_ for id_ in self.list_id if id_ not in previous] + previous:
+            # (images given without file cannot be loaded again)
+            if id_ in self.images and self.images[id_]["image"] is not None and \
+              self.images[id_]["file"] is not None:
+                self._loadedimages[id_] = self.images[id_]["image"]
             
     # ========================== #
     # = Get                    = #
@@ -331,11 +727,16 @@ class ImageCollection( Collection, CatalogueHandler ):
         # -----------------------
         # - image not loaded yet
         if self.images[id]["image"] is None:
-            self._load_image_(id,dataslice0=dataslice0,
-                                 dataslice1=dataslice1,
-                              **kwargs)
-
-        im = self.images[id]["image"]
+            # (returned since it may not fit in the image budget)
+            im = self._load_image_(id,dataslice0=dataslice0,
+                                   dataslice1=dataslice1,
+                                   **kwargs)
+        else:
+            im = self.images[id]["image"]
+            
+        if self._loadedimages is not None and self.images[id]["file"] is not None:
+            # - now the most recently used (its size may have changed)
+            self._loadedimages[id] = im
         # ---------------
         # Target
         if not im.has_target() and self.has_target():
@@ -345,7 +746,7 @@ class ImageCollection( Collection, CatalogueHandler ):
         # Catalogue
         if load_catalogue and self.has_catalogue() and not im.has_catalogue():
             # --- Check if the current catalogue is big enough
-            im.set_catalogue(self.catalogue.copy())
+            im.set_catalogue(self.catalogue.get_view())
 
         return im
 
@@ -411,7 +812,60 @@ class ImageCollection( Collection, CatalogueHandler ):
     # --------------------- #
     # - Get Extraction    - #
     # --------------------- #
-            
+    def get_cutouts(self, targets, radius, runits="arcsec", ids=None, **kwargs):
+        """
+        Cutouts (see Image.get_cutout) around the given targets in every image
+        that contains them. Each image is loaded once and all its cutouts are
+        views of it: nothing is re-read nor re-extracted.
+
+        Parameters
+        ----------
+        targets: [list of AstroTarget or of [ra, dec]]
+            Centers of the cutouts (degree).
+
+        radius, runits: [float, string]
+            Half size of the cutouts and its associated unit.
+
+        ids: [list/None] -optional-
+            Only consider these image ids. None means all.
+
+        **kwargs goes to get_image (if the image has to be loaded)
+
+        Returns
+        -------
+        list (one per target) of dict {image id: cutout}
+        """
+        radecs = [t.radec if "__nature__" in dir(t) and t.__nature__ == "AstroTarget"
+                  else t for t in targets]
+        ids = self.list_id if ids is None else ids
+
+        # -- targets of each image, from the footprint index (see get_target_ids_many)
+        targets_in = {}
+        for id_ in ids:
+            self._test_id_(id_)
+            # - no wcs solution: every target is tried
+            targets_in[id_] = range(len(radecs)) if self.images[id_]["wcs"] is None else []
+        ra, dec = np.asarray(radecs, dtype="float").reshape(-1,2).T
+        for i, ids_ in enumerate(self.get_target_ids_many(ra, dec)):
+            for id_ in ids_:
+                if id_ in targets_in:
+                    targets_in[id_].append(i)
+
+        cutouts = [{} for i in range(len(radecs))]
+        for id_ in ids:
+            in_image = targets_in[id_]
+            if len(in_image) == 0:
+                continue
+            image = self.get_image(id_, load_catalogue=False, **kwargs)
+            for i in in_image:
+                try:
+                    cutouts[i][id_] = image.get_cutout(radecs[i][0], radecs[i][1],
+                                                       radius, runits=runits)
+                except ValueError:
+                    warnings.warn("target %d is not within the image %s"%(i,id_))
+
+        return cutouts
+
           
     # --------------------- #
     # - Get Target        - #
@@ -444,8 +898,57 @@ class ImageCollection( Collection, CatalogueHandler ):
             raise TypeError("The given 'target' must be an astrobject AstroTarget")
         # -----------------
         # - ID information
-        return [id_ for id_ in self.list_id
-            if self.images[id_]["wcs"].coordsAreInImage(target.ra,target.dec)]
+        return self.get_target_ids_many(target.ra,target.dec)[0]
+
+    def get_target_ids_many(self, ra, dec):
+        """
+        For each of the given coordinates, the list of the ids of the images
+        covering it. The images having no wcs solution are ignored.
+
+        The images are first selected using the footprint index (bounding cap of each
+        image, see footprintindex) and the remaining candidates are then tested
+        image by image in pixel space (the coordinates of all the candidate targets of a
+        given image are converted at once).
+
+        Parameters:
+        ----------
+        ra, dec: [float or array]
+            Coordinates (in degree) of the targets
+
+        Return:
+        -------
+        list (one list of ids per target, ids ordered as in list_id)
+        """
+        ra, dec = np.atleast_1d(ra).astype(float), np.atleast_1d(dec).astype(float)
+        out = [[] for i in range(len(ra))]
+        index = self.footprintindex
+        if index is None or len(ra) == 0:
+            return out
+        
+        # -- candidates from the index
+        xyz = radec_to_xyz(ra, dec)
+        candidates = index["tree"].query_ball_point(xyz, r=index["radius"].max())
+        ntarget = np.asarray([len(c_) for c_ in candidates])
+        if ntarget.sum() == 0:
+            return out
+        
+        targetidx = np.repeat(np.arange(len(ra)), ntarget)
+        imageidx  = np.concatenate([c_ for c_ in candidates if len(c_)>0]).astype(int)
+        inradius  = np.sum((xyz[targetidx]-index["center"][imageidx])**2, axis=1) <= index["radius"][imageidx]**2
+        targetidx, imageidx = targetidx[inradius], imageidx[inradius]
+
+        # -- exact test, image per image
+        hits = []
+        for iimage in np.unique(imageidx):
+            targets_ = targetidx[imageidx==iimage]
+            wcs = self.images[index["ids"][iimage]]["wcs"]
+            x, y = np.asarray(wcs.world2pix(ra[targets_], dec[targets_])).T
+            inimage = (x>=0) & (x<=wcs.image_height) & (y>=0) & (y<=wcs.image_width)
+            hits += [(t_,iimage) for t_ in targets_[inimage]]
+            
+        for t_,iimage in sorted(hits):
+            out[t_].append(index["ids"][iimage])
+        return out
             
     def get_target_collection(self,target=None):
         """
@@ -643,6 +1146,95 @@ class ImageCollection( Collection, CatalogueHandler ):
                     self.catalogue.merge(new_cat)
             if self.images[id_]["image"] is not None and not self.images[id_]["image"].has_catalogue():
                 self.images[id_]["image"].set_catalogue(self.catalogue)
+
+    def prefetch_catalogue(self, ids=None, source="sdss", radius_degree=None,
+                           maxradius=1., nthreads=4, fetcher=None, verbose=True, **kwargs):
+        """ download at once the catalogue of the images not yet covered by the
+        current catalogue.
+
+        The cones of the images (as in download_catalogue) are grouped into cones of
+        at most `maxradius` that are downloaded concurrently. There is then one query
+        per sky patch instead of one per image.
+        The queries of the surveys with a row limit (catalogues.ROW_LIMITS) could be
+        truncated: their cones are not grouped.
+
+        Parameters
+        ----------
+        ids: [list/None] -optional-
+            ids of the images (all by default)
+
+        source: [string] -optional-
+            name of the catalogue (see instrument.fetch_catalogue)
+
+        radius_degree: [float/None] -optional-
+            minimum radius (degree) of the cone of an image.
+
+        maxradius: [float] -optional-
+            maximum radius (degree) of the grouped cones. An image whose cone is
+            larger has its own query.
+
+        nthreads: [int] -optional-
+            number of queries run at the same time.
+
+        fetcher: [function/None] -optional-
+            function downloading the catalogue of a cone, called as
+            fetcher(source=, radec=, radius=, **kwargs).
+            instrument.fetch_catalogue by default (e.g. set a local service instead).
+
+        **kwargs goes to the fetcher
+
+        Returns
+        -------
+        int (number of queries)
+        """
+        requested = self.list_id if ids is None else ids
+        # -- images not covered yet
+        ids = [id_ for id_ in requested if self.images[id_]["wcs"] is not None and not
+               (self.has_catalogue() and HAS_SHAPELY and
+                self.catalogue.contours.contains(self.images[id_]["wcs"].contours))]
+        if len(ids) > 0:
+            wcss   = [self.images[id_]["wcs"] for id_ in ids]
+            xyz    = radec_to_xyz(*np.asarray([w_.central_coords for w_ in wcss], dtype="float").T)
+            radius = np.asarray([w_.diag_size/1.5 for w_ in wcss])
+            if radius_degree is not None:
+                radius = np.clip(radius, radius_degree, None)
+            from .instruments.catalogues import ROW_LIMITS, is_truncated
+            cones  = _group_cones_(xyz, radius, 0 if source.lower() in ROW_LIMITS else maxradius)
+            if verbose:
+                print "Fetching %d catalogue cones for %d images"%(len(cones), len(ids))
+            # -- the queries
+            fetcher = inst.fetch_catalogue if fetcher is None else fetcher
+            args = [[fetcher, source,
+                     np.arctan2(c_[1], c_[0])*180/np.pi % 360, np.arcsin(np.clip(c_[2],-1,1))*180/np.pi,
+                     r_, kwargs] for c_,r_,i_ in cones]
+            catalogues = _map_in_bounded_pool_(_fetch_cone_catalogue_, args,
+                                               nprocess=nthreads, threads=True)
+            for cat in catalogues:
+                if isinstance(cat, Exception):
+                    raise cat
+                if is_truncated(source, cat):
+                    warnings.warn("a %s query reached the row limit: the catalogue is incomplete"%source)
+            # -- one catalogue (entries of overlapping cones once)
+            new_cat = catalogues[0]
+            if len(catalogues) > 1:
+                build = new_cat._build_properties.copy()
+                new_cat = new_cat.__class__(empty=True)
+                new_cat.create(table.unique(table.vstack([c_.data for c_ in catalogues]),
+                                            keys=[build["key_ra"],build["key_dec"]]),
+                               None, **build)
+                
+            if not self.has_catalogue():
+                self.set_catalogue(new_cat)
+            else:
+                self.catalogue.merge(new_cat)
+        else:
+            cones = []
+            
+        # -- the images get the catalogue
+        for id_ in requested if self.has_catalogue() else []:
+            if self.images[id_]["image"] is not None and not self.images[id_]["image"].has_catalogue():
+                self.images[id_]["image"].set_catalogue(self.catalogue)
+        return len(cones)
                 
     # ========================== #
     # = Show                   = #
@@ -808,11 +1400,37 @@ class ImageCollection( Collection, CatalogueHandler ):
     def _load_image_(self,id,set_target=True, set_catalogue=True, **kwargs):
         """
         """
-        self.images[id]["image"] = inst.get_instrument(self.images[id]["file"],**kwargs)
+        self.images[id]["image"] = inst.get_instrument(self.images[id]["file"],
+                                                       instrument=self.images[id].get("instrument",None),
+                                                       **kwargs)
         if self.has_catalogue():
-            self.images[id]["image"].set_catalogue(self.catalogue.copy())
+            self.images[id]["image"].set_catalogue(self.catalogue.get_view())
         if self.has_target():
             self.images[id]["image"].set_target(self.target)
+        # - sep extraction saved when the image has been unloaded
+        spilled = self.images[id].get("sepoutput",None)
+        if spilled is not None and os.path.isfile(spilled["file"]) and \
+          tuple(self.images[id]["image"]._dataslicing) == spilled["dataslicing"]:
+            self.images[id]["image"]._derived_properties["sepoutput"] = np.load(spilled["file"])
+        image = self.images[id]["image"]
+        if self._loadedimages is not None:
+            self._loadedimages[id] = image
+        return image
+
+    def _unload_image_(self, id, image):
+        """ drop the given image, keeping its file and wcs information
+        (called when the image budget is exceeded, see set_image_budget) """
+        if id not in self.images or self.images[id]["image"] is not image:
+            return
+        budget = self._side_properties["imagebudget"]
+        if budget["spill_sepobjects"] and image._derived_properties["sepoutput"] is not None:
+            if budget["spilldir"] is None:
+                budget["spilldir"] = tempfile.mkdtemp(prefix="astrobject_")
+            filename = os.path.join(budget["spilldir"], "%s.sepoutput.npy"%id)
+            np.save(filename, image._derived_properties["sepoutput"])
+            self.images[id]["sepoutput"] = {"file":filename,
+                                            "dataslicing":tuple(image._dataslicing)}
+        self.images[id]["image"] = None
             
     # ========================== #
     # = Properties             = #
@@ -823,6 +1441,16 @@ class ImageCollection( Collection, CatalogueHandler ):
         """
         return self._handler
 
+    @property
+    def _loadedimages(self):
+        """ LRU record of the loaded images (None if no image budget is set, see set_image_budget) """
+        return self._derived_properties["loadedimages"]
+
+    @property
+    def imagebudget(self):
+        """ memory budget of the loaded images (see set_image_budget) """
+        return self._side_properties["imagebudget"]
+    
     @property
     def _imageids(self):
         print "_imageids to be changed to self.list_id"
@@ -857,9 +1485,51 @@ class ImageCollection( Collection, CatalogueHandler ):
         # -- This might be included in the add/remove image tools
         return [self.images[id_]["image"].bandname
                   if self.images[id_]["image"] is not None \
+                  else self.images[id_]["bandname"] if "bandname" in self.images[id_].keys()\
                   else inst.which_band_is_file(self.images[id_]["file"])
                 for id_ in self.list_id]
 
+    # ------------------
+    # - Footprint index
+    @property
+    def footprintindex(self):
+        """ Spatial index of the image footprints used by get_target_ids_many.
+        This is a dict containing a KD-tree ('tree') of the image centers on the unit
+        sphere, the centers ('center') and the chord radius of the cap bounding each
+        image ('radius') and the corresponding image 'ids'.
+        It is built on first use and reset every time an image is added or removed.
+        (None if no image has a wcs solution)
+        """
+        if self._derived_properties["footprintindex"] is None:
+            self._derived_properties["footprintindex"] = self._build_footprint_index_()
+        return self._derived_properties["footprintindex"]
+
+    def _build_footprint_index_(self):
+        """ builds the footprintindex from the wcs solution of the images """
+        from scipy.spatial import cKDTree
+        ids, centers, radius = [], [], []
+        for id_ in self.list_id:
+            wcs = self.images[id_]["wcs"]
+            if wcs is None:
+                continue
+            height, width = wcs.image_height, wcs.image_width
+            corners = radec_to_xyz(*np.asarray([wcs.pix2world(x_,y_) for x_,y_ in
+                                                [[0,0],[height,0],[height,width],[0,width]]]).T)
+            center = corners.mean(axis=0)
+            center /= np.sqrt(np.sum(center**2))
+            ids.append(id_)
+            centers.append(center)
+            # 1% margin for the edges of the image that are not great circles
+            radius.append(np.sqrt(np.sum((corners-center)**2, axis=1)).max()*1.01)
+            
+        if len(ids) == 0:
+            return None
+        
+        return {"tree":cKDTree(np.asarray(centers)),
+                "center":np.asarray(centers),
+                "radius":np.asarray(radius),
+                "ids":ids}
+        
     # ------------------
     # - Shapely Based
     @property
@@ -473,7 +473,10 @@ class PhotoMap( PhotoPointCollection, WCSHandler, CatalogueHandler ):
             
         # -- matching are made in degree space
         skyradec = self.get_skycoords(**kwargs)
-        idxcatalogue, idxsepobjects, d2d, d3d = skyradec.search_around_sky(self.catalogue.sky_radec, deltadist)
+        idxsepobjects, idxcatalogue, d2d = \
+          self.catalogue.get_idx_around(skyradec.ra.deg, skyradec.dec.deg,
+                                        deltadist.to("arcsec").value, runits="arcsec",
+                                        targetidx=True)
         
         # --------------------
         # - Save the results
@@ -846,7 +849,7 @@ class PhotoMap( PhotoPointCollection, WCSHandler, CatalogueHandler ):
         self.set_meta("ra",ra)
         self.set_meta("dec",dec)
 
-    def _derive_xy_():
+    def _derive_xy_(self):
         """ derives the x y values from the wcs solution """
         if not self.has_wcs():
             raise AttributeError("You need a wcs solution to convert radec to pixels. None set.")
@@ -954,7 +957,7 @@ class SepObject( PhotoMap ):
 
     PROPERTIES         = []
     SIDE_PROPERTIES    = []
-    DERIVED_PROPERTIES = ["galaxy_contours","ingalaxy_mask"]
+    DERIVED_PROPERTIES = ["galaxy_contours","galaxy_ellipses","ingalaxy_mask"]
         
     # -------------------------- #
     # -  Plotting tools        - #
@@ -1269,7 +1272,7 @@ class SepObject( PhotoMap ):
         2D-bool array (height x width)
         """
         from sep import mask_ellipse
-        ellipsemask = np.asarray(np.zeros((height,width)),dtype="bool")
+        ellipsemask = np.zeros((height,width), dtype="bool")
         mask = None if not apply_catmask else self.catmask
         # -- Apply the mask to falsemask
         mask_ellipse(ellipsemask,
@@ -1279,6 +1282,25 @@ class SepObject( PhotoMap ):
                      r=r)
         
         return ellipsemask
+
+    def get_galaxy_ellipses(self, scaleup=5):
+        """ x, y, a, b, theta of the ellipses of the detected galaxies
+        (non-star catalogue entries) with a and b scaled up by `scaleup`.
+        (recorded per scaleup value)
+
+        Returns:
+        -------
+        array (5 x N)
+        """
+        if self._derived_properties["galaxy_ellipses"] is None:
+            self._derived_properties["galaxy_ellipses"] = {}
+        if scaleup not in self._derived_properties["galaxy_ellipses"]:
+            x,y,a,b,t = np.asarray(self.get_ellipse_values(
+                mask=self.get_indexes(nonstars_only=True, stars_only=False,
+                                      cat_indexes=False)), dtype="float").reshape(5,-1)
+            self._derived_properties["galaxy_ellipses"][scaleup] = \
+              np.asarray([x, y, a*scaleup, b*scaleup, t])
+        return self._derived_properties["galaxy_ellipses"][scaleup]
     
     # =============================== #
     # = properties                  = #
@@ -1302,29 +1324,23 @@ class SepObject( PhotoMap ):
             raise AttributeError("No Catalogue loaded. Requested for the galaxy mask")
         
         if self._derived_properties["ingalaxy_mask"] is None:
-            from ...utils.shape import Point
+            from ...utils.shape import points_in_ellipses
             # -- This won't do anything if this is already loaded
             #    otherwise, loads the catalogue with the ingalaxy info
-            self.catalogue.set_ingalaxymask(self.galaxy_contours)
+            self.catalogue.set_ingalaxymask(ellipses=self.get_galaxy_ellipses())
             # -- Ok let's build the mask, first, from the Catalogue values
-            galaxymask = np.zeros(self.nsources)
+            galaxymask = np.zeros(self.nsources, dtype="bool")
             catgalmask = np.asarray(self.catalogue.ingalaxymask,dtype="bool")
             idxIn  = self.catmatch["idx"][ catgalmask[self.catmatch["idx_catalogue"]]]
             idxOut = self.catmatch["idx"][~catgalmask[self.catmatch["idx_catalogue"]]]
-            idxtbd = np.asarray([i for i in range(self.nsources) if i not in
-                      idxIn.tolist()+idxOut.tolist()])
-        
-            listingal = idxtbd[\
-                np.asarray([self.galaxy_contours.contains(p_) for p_ in \
-                [Point(x_,y_) for x_,y_ in self.get(["x","y"],mask=idxtbd)]
-                ],dtype=bool)]
-            
+            idxtbd = np.setdiff1d(np.arange(self.nsources), self.catmatch["idx"])
+            # -- the unmatched sources are tested against the galaxies' ellipses
+            if len(idxtbd)>0:
+                x, y = np.asarray(self.get(["x","y"],mask=idxtbd), dtype="float").reshape(-1,2).T
+                galaxymask[idxtbd] = points_in_ellipses(x, y, *self.get_galaxy_ellipses())
             galaxymask[idxIn] = True
             galaxymask[idxOut] = False
-            galaxymask[idxtbd] = False
-            galaxymask[listingal] = True # this is a subpart of idxtbd
-            self._derived_properties["ingalaxy_mask"] = np.asarray(galaxymask,
-                                                                   dtype="bool")
+            self._derived_properties["ingalaxy_mask"] = galaxymask
               
         return self._derived_properties["ingalaxy_mask"]
 
@@ -1,6 +1,7 @@
 #! /usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import os
 import warnings
 import numpy as np
 
@@ -13,13 +14,31 @@ from astropy.io import ascii
 
 # - local
 from .. import astrometry
-from ..photometry import Image, get_photopoint
+from ..photometry import Image, get_photopoint, get_photopointarray
 from ..baseobject import BaseObject, WCSHandler
 from ..utils.decorators import _autogen_docstring_inheritance
-from ..utils.tools import kwargs_update, mag_to_flux, load_pkl, dump_pkl
+from ..utils.tools import kwargs_update, mag_to_flux, load_pkl, dump_pkl, LRUCache, \
+     radec_to_xyz, deg_to_chord, chord_to_deg
 from ..utils       import shape
 
-__all__ = ["Instrument"]
+__all__ = ["Instrument","get_header"]
+
+# Headers already read, shared by all the instrument file tests
+# (is_*_file, which_band_is_file, which_obs_mjd...)
+HEADER_CACHE = LRUCache(maxsize=512)
+
+def get_header(filename, ext=0):
+    """ The header of the given fits file extension (as pf.getheader).
+    Headers are kept in an LRU cache (HEADER_CACHE) so that the instrument
+    tests do not read the same file again. A file modified since it has been
+    cached is read again. The returned header is shared: do not modify it.
+    """
+    key = (os.path.abspath(filename), ext, os.path.getmtime(filename))
+    header = HEADER_CACHE.get(key)
+    if header is None:
+        header = pf.getheader(filename, ext=ext)
+        HEADER_CACHE[key] = header
+    return header
 
 class Instrument( Image ):
     """
@@ -59,6 +78,15 @@ class Instrument( Image ):
                             instrument_name=self.instrument_name)
                             for flux_,var_ in zip(flux,var)]
     
+    def _aperture_to_photopointarray_(self, count, err, flag,
+                                      coords=None, wcs_coords=False):
+        """ convert the aperture output to a PhotoPointArray (columnar photopoints) """
+        return get_photopointarray(flux=self.count_to_flux(np.asarray(count)),
+                                   var=self.count_to_flux(np.asarray(err))**2,
+                                   flags=flag, coords=coords, wcs_coords=wcs_coords,
+                                   source="image",mjd=self.mjd,
+                                   lbda=self.lbda, zp=self.mab0, bandname=self.bandname,
+                                   instrument_name=self.instrument_name)
         
     @_autogen_docstring_inheritance(Image.get_aperture,"Image.get_aperture")
     def get_photopoint(self,x, y, radius=None, runits="pixels",
@@ -66,10 +94,18 @@ class Instrument( Image ):
                        **kwargs):
         #
         # Returns a PhotoPoint
+        # getlist: True returns the list of PhotoPoints,
+        #          'array' returns a PhotoPointArray (columnar, no per-point object)
         #
-        pp = self._aperture_to_photopoint_(*self.get_aperture(x,y,radius=radius,runits=runits,
-                                                            aptype=aptype,wcs_coords=wcs_coords,
-                                                            **kwargs))
+        apertures = self.get_aperture(x,y,radius=radius,runits=runits,
+                                      aptype=aptype,wcs_coords=wcs_coords,
+                                      **kwargs)
+        if getlist in ["array","columns"]:
+            return self._aperture_to_photopointarray_(*apertures,
+                                                      coords=np.asarray([x,y]).T,
+                                                      wcs_coords=wcs_coords)
+        
+        pp = self._aperture_to_photopoint_(*apertures)
         # ------------------
         # - One Photopoint
         if "__iter__" not in dir(pp) or len(pp)==1 or getlist:
@@ -225,7 +261,8 @@ class Catalogue( WCSHandler ):
     PROPERTIES         = ["filename","data","header"]
     SIDE_PROPERTIES    = ["fovcontours","fovmask","matchedmask",
                           "lbda","excluded_list"]
-    DERIVED_PROPERTIES = ["fits","naround","naround_nofovcut","contours"]
+    DERIVED_PROPERTIES = ["fits","naround","naround_nofovcut","contours",
+                          "viewof","kdtree","maskcache","columncache"]
 
 
     def __init__(self, catalogue_file=None,
@@ -298,14 +335,25 @@ class Catalogue( WCSHandler ):
         """
         # ---------------------
         # - Parsing the input
-        if catalogue_file.endswith(".fits"):
+        copy_data = True
+        if os.path.isdir(catalogue_file):
+            # loading from a directory of columns (see cataloguestore)
+            from .cataloguestore import read_columns
+            fits   = None
+            header = None
+            data   = read_columns(catalogue_file, mmap_mode="r")
+            copy_data = False
+            
+        elif catalogue_file.endswith(".fits"):
             # loading from fits file
             fits   = pf.open(catalogue_file)
             header = fits[self._build_properties["data_index"]].header
             data   = fits[self._build_properties["data_index"]].data
             if type(data) == pf.fitsrec.FITS_rec:
-                from astrobject.utils.tools import fitsrec_to_dict
-                data = TableColumns(fitsrec_to_dict(data))
+                # - the columns remain those (memory mapped) of the file
+                data = Table([data[name] for name in data.names],
+                             names=data.names, copy=False)
+                copy_data = False
                 
         elif catalogue_file.endswith(".pkl"):
             # loading from pkl
@@ -325,12 +373,12 @@ class Catalogue( WCSHandler ):
             
         # ---------------------
         # - Calling Creates
-        self.create(data, header, **kwargs)
+        self.create(data, header, copy_data=copy_data, **kwargs)
         self._properties["filename"] = catalogue_file
         self._derived_properties["fits"] = fits
 
         
-    def create(self,data,header,force_it=True,**build):
+    def create(self,data,header,force_it=True,copy_data=True,**build):
         """ builds the catalogue
 
         Parameters
@@ -349,6 +397,10 @@ class Catalogue( WCSHandler ):
         force_it: [bool] -optional-
             if data already exists, set force_it to true to overwrite it.
 
+        copy_data: [bool] -optional-
+            copy the given columns. Set False to keep the given buffers
+            (e.g. memory mapped columns); they then must not be modified.
+
         **build goes to the build dictorty (key_mag, data_slice etc.)
         
         Returns
@@ -359,11 +411,14 @@ class Catalogue( WCSHandler ):
             raise AttributeError("'data' is already defined."+\
                     " Set force_it to True if you really known what you are doing")
     
-        self._properties["data"] = Table(data)
+        self._properties["data"] = Table(data, copy=copy_data)
         self._properties["header"] = header if header is not None \
           else pf.Header()
         self.set_starsid(build.pop("key_class",None),build.pop("value_star",None))
         self._build_properties = kwargs_update(self._build_properties,**build)
+        self._derived_properties["kdtree"] = None
+        self.reset_mask_cache()
+        self.reset_column_cache()
         # -------------------------------
         # - Try to get the fundamentals
         if self._build_properties['key_ra'] is None:
@@ -386,13 +441,47 @@ class Catalogue( WCSHandler ):
             
         self._build_properties['key_class'] = key
         self._build_properties['value_star'] = value
+        self.reset_mask_cache()
+        
+    def get_view(self):
+        """ get a catalogue sharing the data of the current instance.
+
+        The table, the header and the contours are shared (not copied) while the
+        wcs solution and the masks (fovmask, matchedmask ...) are own by the view.
+        This is the way to give a large catalogue to many images: contrary to copy(),
+        the cost of a view does not depend on the size of the table.
+
+        The shared table is considered read-only: a view adding a column
+        (e.g. set_ingalaxymask) first gets its own table (sharing the column data).
+
+        Returns
+        -------
+        Catalogue (same class as the current instance)
+        """
+        view = self.__class__(empty=True)
+        for prop in ["_properties","_side_properties",
+                     "_derived_properties","_build_properties"]:
+            getattr(view, prop).update(getattr(self, prop))
+        view._derived_properties["viewof"] = self.viewof if self.is_view() else self
+        # - the tree of the full catalogue is shared, not that of the fov
+        view._derived_properties["kdtree"] = {"all":self._kdtrees.get("all",None)}
+        view._derived_properties["maskcache"] = None
+        view._derived_properties["columncache"] = None
+        return view
+
+    def _detach_view_(self):
+        """ a view gets its own table (the column data remain shared)
+        before it is modified """
+        if self.is_view():
+            self._properties["data"] = self.data.copy(copy_data=False)
+            self._derived_properties["viewof"] = None
         
     def extract(self,contours):
         """  get a subpart of the existing catalogue based on the given 'contours'.
         'contours' is a shapely.Polygon or a matplotlib.patches.Polygon
         (see shape.point_in_contours)
         """
-        mask = shape.point_in_contours(self._ra,self._dec,contours) # WRONG
+        mask = shape.points_in_contours(self._ra,self._dec,contours)
         copy_ = self.copy()
         copy_.create(self.data[mask],None,force_it=True)
         return copy_
@@ -419,6 +508,9 @@ class Catalogue( WCSHandler ):
         from astropy.table import join
         
         self._properties["data"] = join(self.data,datatable,join_type='outer')
+        self._derived_properties["kdtree"] = None
+        self.reset_mask_cache()
+        self.reset_column_cache()
         self._update_fovmask_()
 
     def merge(self,catalogue_):
@@ -472,16 +564,21 @@ class Catalogue( WCSHandler ):
         """ provide the catalogue entry  associated with magnitude """
         self._build_properties["key_mag"] = key_mag
         self._build_properties["key_magerr"] = key_magerr
+        self.reset_mask_cache()
+        self.reset_column_cache()
 
     def set_coord_keys(self,key_ra,key_dec):
         """ provide the catalogue entry  associated with coordinates (Ra and Dec) """
         self._build_properties["key_ra"] = key_ra
         self._build_properties["key_dec"] = key_dec
+        self._derived_properties["kdtree"] = None
+        self.reset_column_cache()
         
     def set_wcs(self,wcs,force_it=False,update_fovmask=True):
         """
         """
         super(Catalogue, self).set_wcs(wcs, force_it=force_it)
+        self._columns.pop("wcs_xy",None)
         
         if update_fovmask:
             if self.has_wcs() and shape.HAS_SHAPELY and self.wcs.has_contours():
@@ -523,71 +620,89 @@ class Catalogue( WCSHandler ):
         This methods enable to set to matchedmask, this mask is an addon
         mask that indicate which point from the catalogue (after the fov cut)
         has been matched by for instance a sextractor/sep extraction.
+
+        matchedmask could be a boolean mask or a list of matched index (from
+        SkyCoord matching fuction e.g.). Repeated index are allowed.
         
         Set None to remove the matching association
         """
+        self.reset_mask_cache()
         if matchedmask is None:
             self._side_properties["matchedmask"] = None
             return
+        matchedmask = np.asarray(matchedmask)
         if len(matchedmask) == 0:
-            self._side_properties["matchedmask"] = np.zeros(self.nobjects_in_fov)
+            self._side_properties["matchedmask"] = np.zeros(self.nobjects_in_fov, dtype=bool)
             return
-        if type(matchedmask[0]) is bool:
+        if matchedmask.dtype == bool:
             # - it already is a mask, good
-            self._side_properties["matchedmask"] = np.asarray(matchedmask,dtype=bool)
+            self._side_properties["matchedmask"] = matchedmask
             return
 
-        if type(matchedmask[0]) in [int,np.int32,np.int64]:
-            # it must be a list of matched index (from SkyCoord matching fuction e.g.)
-            self._side_properties["matchedmask"] = \
-              np.asarray([i in matchedmask for i in range(len(self.ra))],dtype=bool)
+        if np.issubdtype(matchedmask.dtype, np.integer):
+            mask = np.zeros(self.nobjects_in_fov, dtype=bool)
+            mask[matchedmask] = True
+            self._side_properties["matchedmask"] = mask
             return
         
         raise TypeError("the format of the given 'matchedmask' is not recongnized. "+\
                 "You could give a booleen mask array or a list of accepted index")
                      
-    def set_ingalaxymask(self, galaxycontours, reset=False):
+    def set_ingalaxymask(self, galaxycontours=None, reset=False, ellipses=None):
         """
-        The will update the current ingalaxy mask with the given contours.
+        The will update the current ingalaxy mask with the given galaxies.
         If a galaxy mask already exist, this will only check the None value,
         use reset=True
         to restart the process from stratch (slower).
 
         This will update the fundamental self.data. This way, saving it will save
         this information.
+
+        Parameters
+        ----------
+        galaxycontours: [shapely (Multi)Polygon] -optional-
+            contours (in pixels) of the galaxies.
+
+        ellipses: [5xN array] -optional-
+            x, y, a, b, theta (pixels, radian) of the galaxies' ellipses.
+            Used instead of galaxycontours, they are tested analytically
+            (see shape.points_in_ellipses).
+            
+        reset: [bool] -optional-
+            check again the entries already checked.
         """
+        if galaxycontours is None and ellipses is None:
+            raise ValueError("galaxycontours or ellipses must be given")
         
         # -- Sarting points
-        galmask = np.asarray([np.NaN]*self.nobjects) \
-          if not self.has_ingalaxymask() or reset else self._ingalaxymask
+        galmask = np.ones(self.nobjects)*np.NaN \
+          if not self.has_ingalaxymask() or reset else \
+          np.array(self._ingalaxymask, dtype="float")
         
         # -- ID to work with, i.e. are not None and are in the FoV
-        idx = np.asarray([i for i in np.arange(self.nobjects)
-               if galmask[i]!=galmask[i] and self.fovmask[i]])
+        idx = np.argwhere(np.isnan(galmask) & np.asarray(self.fovmask, dtype=bool)).ravel()
         
         if len(idx) == 0:
             warnings.warn("No new coordinates needs a 'ingalaxy' to check")
             return
          
-        # -- ID that are galaxies
-        idxgal    = np.asarray(idx[~self._starmask[idx]])
-        idxnotgal = np.asarray(idx[ self._starmask[idx]])
+        # -- ID that are galaxies are in.
+        starmask = np.asarray(self._starmask[idx], dtype=bool)
+        galmask[idx] = ~starmask
         
         # -- ID that are not galaxies but are in
-        from ...utils.shape import Point
-        listingal = idxnotgal[\
-            np.asarray([galaxycontours.contains(p_) for p_ in \
-            [Point(x_,y_) for x_,y_ in \
-             self.wcs.world2pix(self._ra[idxnotgal],self._dec[idxnotgal])]
-             ],dtype=bool)]
-        
-        # -- And let's set what should be
-        gal = idxgal.tolist() + listingal.tolist()
-        galmask[idx] = False # Not in galaxy
-        galmask[np.asarray(gal)] = True# Except if they are
-
+        idxnotgal = idx[starmask]
+        if len(idxnotgal)>0:
+            x, y = np.asarray(self.wcs.world2pix(np.asarray(self._ra)[idxnotgal],
+                                                 np.asarray(self._dec)[idxnotgal])).reshape(-1,2).T
+            galmask[idxnotgal] = shape.points_in_ellipses(x, y, *ellipses) if ellipses is not None\
+              else shape.points_in_contours(x, y, galaxycontours)
+
+        self._detach_view_()
         self.data.add_column(Column(galmask,name="ingalaxy"),
                              rename_duplicate="ingalaxy" in self.data.keys())
+        self.reset_mask_cache()
+        self.reset_column_cache()
         
     # --------------------- #
     #  convertion methods   #
@@ -635,10 +750,10 @@ class Catalogue( WCSHandler ):
         if "__iter__" in dir(key):
             return [self.get(key_,mask=mask) for key_ in key]
         
-        if key in dir(self):
-            val_ = eval("self.%s"%key) if infov else eval("self._%s"%key)
-        elif key in self.data.keys():
-            val_ = self.data[key][self.fovmask] if infov else self.data[key]
+        if isinstance(getattr(self.__class__, key, None), property):
+            val_ = getattr(self, key if infov else "_%s"%key)
+        elif key in self.data.colnames:
+            val_ = self._get_infov_("data:%s"%key, self.data[key]) if infov else self.data[key]
         else:
             raise ValueError("Unknown key %s"%key)
         
@@ -685,8 +800,38 @@ class Catalogue( WCSHandler ):
                  isolated_only=False, nonstars_only=False,
                  contours=None, notingalaxy=False, matched=False,
                  fovmask=True):
-        """ This returns a bolean mask following the argument cuts. """
-        
+        """ This returns a bolean mask following the argument cuts.
+
+        The masks are cached (per set of cuts) until the state of the catalogue
+        changes (fovmask, matchedmask, ingalaxy, define_around, exclusion, keys, data).
+        See mask_cache_info.
+        """
+        key = (tuple(catmag_range), bool(stars_only), bool(isolated_only),
+               bool(nonstars_only), None if contours is None else contours.wkb,
+               bool(notingalaxy), bool(matched), bool(fovmask))
+        mask = self._maskcache.get(key)
+        if mask is None:
+            mask = self._get_mask_(catmag_range=list(catmag_range), stars_only=stars_only,
+                                   isolated_only=isolated_only, nonstars_only=nonstars_only,
+                                   contours=contours, notingalaxy=notingalaxy,
+                                   matched=matched, fovmask=fovmask)
+            self._maskcache[key] = mask
+        return mask.copy()
+
+    def reset_mask_cache(self):
+        """ empty the get_mask cache (the hit/miss counters are kept) """
+        if self._derived_properties["maskcache"] is not None:
+            self._derived_properties["maskcache"].clear(counters=False)
+
+    def reset_column_cache(self):
+        """ empty the cache of the FoV-filtered columns (ra, dec, mag, sky_radec ...) """
+        self._derived_properties["columncache"] = None
+
+    def _get_mask_(self,catmag_range=[None,None],stars_only=False,
+                   isolated_only=False, nonstars_only=False,
+                   contours=None, notingalaxy=False, matched=False,
+                   fovmask=True):
+        """ builds the get_mask mask (no cache) """
         mask = np.ones(self.nobjects_in_fov, dtype="bool") if fovmask else\
           np.ones(self.nobjects, dtype="bool")
 
@@ -787,27 +932,31 @@ class Catalogue( WCSHandler ):
             raise AttributeError("Needs a wcs solution to get pixel coordinates")
         if not wcs_coords:
             ra,dec = np.asarray(self.wcs.pix2world(ra,dec)).T
-        if "__iter__" not in dir(ra):
-            ra = [ra]
-            dec = [dec]
-        skytarget = coordinates.SkyCoord(ra*units.degree,dec*units.degree)
+        ra, dec = np.atleast_1d(ra), np.atleast_1d(dec)
         
         # -------------
         # - Cat matching
-        catsky = self.sky_radec if infov else self._sky_radec
-        if mask is not None:
-            catsky = catsky[mask]
-            
-        return coordinates.match_coordinates_sky(skytarget, catsky)[:2]
+        if mask is None:
+            tree = self.get_kdtree(infov=infov)
+        else:
+            tree = self._get_masked_kdtree_(mask, infov=infov)
+        dist, idx = tree.query(radec_to_xyz(ra, dec))
+        return idx, coordinates.Angle(chord_to_deg(dist), unit="degree")
         
     def get_idx_around(self,ra,dec,radius,runits="arcsec",wcs_coords=True,
-                       infov=True):
+                       infov=True, targetidx=False):
         """
         Returns the catalogue indexes of the elements within `radius` `runits`around
-        the `ra` `dec` location.
+        the `ra` `dec` location(s).
+
+        Set targetidx to True to know which of the given locations each element
+        is around (many locations are queried at once).
+        
         Returns:
         --------
         2xN index array (idx, angular sep. N is the number of matching elements.)
+        [3xN (targetidx, idx, angular sep.) if targetidx]
+        The elements are sorted by location and then by index.
         """
         # --------------
         # - Input 
@@ -815,27 +964,29 @@ class Catalogue( WCSHandler ):
             raise AttributeError("Needs a wcs solution to get pixel coordinates")
         if not wcs_coords:
             ra,dec = np.asarray(self.wcs.pix2world(ra,dec)).T
-        if "__iter__" not in dir(ra):
-            ra = [ra]
-            dec = [dec]
-            
-        skytarget = coordinates.SkyCoord(ra*units.degree,dec*units.degree)
-        catsky = self.sky_radec if infov else self._sky_radec
-        return catsky.search_around_sky(skytarget,
-                                        radius*units.Unit(runits))[1:3]
+        ra, dec = np.atleast_1d(ra), np.atleast_1d(dec)
+        
+        tree = self.get_kdtree(infov=infov)
+        xyz  = radec_to_xyz(ra, dec)
+        matches = tree.query_ball_point(xyz, deg_to_chord((radius*units.Unit(runits)).to("degree").value))
+        
+        target_ = np.repeat(np.arange(len(ra)), [len(m_) for m_ in matches])
+        idx = np.concatenate([np.sort(m_) for m_ in matches]).astype(int) if len(target_)>0 \
+          else np.asarray([], dtype=int)
+        sep = coordinates.Angle(chord_to_deg(np.sqrt(np.sum((tree.data[idx]-xyz[target_])**2, axis=1))),
+                                unit="degree")
+        return (target_, idx, sep) if targetidx else (idx, sep)
         
     def get_contour_mask(self, contours, infov=True):
         """  returns a boolean array for the given contours """
         if contours is None:
-            return np.asarray([True for ra in self._ra])
+            return np.ones(len(self.ra if infov else self._ra), dtype=bool)
         
         if type(contours) != shape.polygon.Polygon and\
            type(contours) != shape.multipolygon.MultiPolygon:
             raise TypeError("contours must be a shapely Polygon or MultiPolygon")
-        _ra = self.ra if infov else self._ra
-        _dec = self.dec if infov else self._dec
-        return np.asarray([shape.point_in_contours(ra,dec, contours)
-                           for ra,dec in zip(_ra,_dec)])
+        return shape.points_in_contours(self.ra if infov else self._ra,
+                                        self.dec if infov else self._dec, contours)
 
     # --------------------- #
     # Convertors            #
@@ -864,10 +1015,12 @@ class Catalogue( WCSHandler ):
             print "WARNING: No value excluded. not match"
             return
         self._side_properties["excluded_list"] = self.excluded_list.tolist()+ids_to_exclude.tolist()
+        self.reset_mask_cache()
         
     def clear_excluded_list(self):
         """ empty the exclusion list """
         self._side_properties["excluded_list"] = None
+        self.reset_mask_cache()
         
     # --------------------- #
     # PLOT METHODS          #
@@ -1060,12 +1213,18 @@ class Catalogue( WCSHandler ):
     
     def _load_default_fovmask_(self):
         self._side_properties["fovmask"] = np.ones(self.nobjects,dtype=bool)
+        self._kdtrees.pop("fov",None)
+        self.reset_mask_cache()
+        self.reset_column_cache()
         
     @fovmask.setter
     def fovmask(self,newmask):
         if len(newmask) != self.nobjects:
             raise ValueError("the given 'mask' must have the size of 'ra'")
         self._side_properties["fovmask"] = newmask
+        self._kdtrees.pop("fov",None)
+        self.reset_mask_cache()
+        self.reset_column_cache()
 
     # -- Exclusion
     @property
@@ -1113,7 +1272,7 @@ class Catalogue( WCSHandler ):
     @property
     def ra(self):
         """Barycenter position along world x axis"""
-        return self._ra[self.fovmask]
+        return self._get_infov_("ra", self._ra)
     
     @property
     def _ra(self):
@@ -1124,7 +1283,7 @@ class Catalogue( WCSHandler ):
     @property
     def dec(self):
         """arycenter position along world y axis"""
-        return self._dec[self.fovmask]
+        return self._get_infov_("dec", self._dec)
     
     @property
     def _dec(self):
@@ -1135,18 +1294,22 @@ class Catalogue( WCSHandler ):
     @property
     def sky_radec(self):
         """This is an advanced radec methods tight to astropy SkyCoords"""
-        return coordinates.SkyCoord(ra=self.ra,dec=self.dec, unit="deg")
+        if "sky_radec" not in self._columns:
+            self._columns["sky_radec"] = coordinates.SkyCoord(ra=self.ra,dec=self.dec, unit="deg")
+        return self._columns["sky_radec"]
 
     @property
     def _sky_radec(self):
         """This is an advanced radec methods tight to astropy SkyCoords"""
-        return coordinates.SkyCoord(ra=self._ra,dec=self._dec, unit="deg")
+        if "_sky_radec" not in self._columns:
+            self._columns["_sky_radec"] = coordinates.SkyCoord(ra=self._ra,dec=self._dec, unit="deg")
+        return self._columns["_sky_radec"]
     
     # - mag
     @property
     def mag(self):
         """Generic magnitude"""
-        return self._mag[self.fovmask]
+        return self._get_infov_("mag", self._mag)
 
     @property
     def _mag(self):
@@ -1160,7 +1323,7 @@ class Catalogue( WCSHandler ):
     @property
     def mag_err(self):
         """Generic magnitude RMS error"""
-        return self._mag_err[self.fovmask]
+        return self._get_infov_("mag_err", self._mag_err)
 
     @property
     def _mag_err(self):
@@ -1210,7 +1373,7 @@ class Catalogue( WCSHandler ):
     
     @property
     def objecttype(self):
-        return self._objecttype[self.fovmask]
+        return self._get_infov_("objecttype", self._objecttype)
 
     @property
     def _objecttype(self):
@@ -1252,25 +1415,100 @@ class Catalogue( WCSHandler ):
     def fits(self):
         return self._derived_properties["fits"]
 
+    def get_kdtree(self, infov=True):
+        """ KD-tree (scipy cKDTree) of the unit vectors (see radec_to_xyz) of the
+        entries (only those in the FoV if infov). It is built once per data and fovmask
+        and the one of the full catalogue is shared by the views (see get_view).
+        """
+        key = "fov" if infov and not np.all(self.fovmask) else "all"
+        if self._kdtrees.get(key,None) is None:
+            from scipy.spatial import cKDTree
+            self._kdtrees[key] = cKDTree(radec_to_xyz(np.asarray(self.ra if key=="fov" else self._ra),
+                                                      np.asarray(self.dec if key=="fov" else self._dec)))
+        return self._kdtrees[key]
+
+    @property
+    def _kdtrees(self):
+        """ cache of get_kdtree """
+        if self._derived_properties["kdtree"] is None:
+            self._derived_properties["kdtree"] = {}
+        return self._derived_properties["kdtree"]
+    
+    def _get_masked_kdtree_(self, mask, infov=True):
+        """ KD-tree of the masked entries (index of the masked catalogue).
+        The last one is kept (nearest-entry loops usually reuse the same mask). """
+        mask = np.asarray(mask)
+        key  = (infov, mask.dtype.str, mask.tostring())
+        if self._columns.get("masked_kdtree",[None])[0] != key:
+            from scipy.spatial import cKDTree
+            self._columns["masked_kdtree"] = \
+              [key, cKDTree(radec_to_xyz(np.asarray(self.ra if infov else self._ra)[mask],
+                                         np.asarray(self.dec if infov else self._dec)[mask]))]
+        return self._columns["masked_kdtree"][1]
+    
+    def _get_infov_(self, key, values):
+        """ `values` (full catalogue) in the FoV. Cached under `key` until the
+        fovmask or the data change (see reset_column_cache). Do not modify it. """
+        if key not in self._columns:
+            self._columns[key] = values if np.all(self.fovmask) else values[self.fovmask]
+        return self._columns[key]
+
+    @property
+    def _columns(self):
+        """ cache of the FoV-filtered columns """
+        if self._derived_properties["columncache"] is None:
+            self._derived_properties["columncache"] = {}
+        return self._derived_properties["columncache"]
+    
+    @property
+    def _maskcache(self):
+        """ cache of get_mask """
+        if self._derived_properties["maskcache"] is None:
+            self._derived_properties["maskcache"] = LRUCache(maxsize=64)
+        return self._derived_properties["maskcache"]
+
+    @property
+    def mask_cache_info(self):
+        """ status of the get_mask cache (hits, misses, size ...) """
+        return self._maskcache.info
+    
+    @property
+    def viewof(self):
+        """ catalogue whose data are shared by this instance (see get_view) """
+        return self._derived_properties["viewof"]
+
+    def is_view(self):
+        """ Test if this instance shares the data of an other catalogue (see get_view) """
+        return self.viewof is not None
+
     @property
     def wcs_xy(self):
-        if self.has_wcs():
-            return np.asarray(self.wcs.world2pix(self.ra,self.dec)).T
-        raise AttributeError("no 'wcs' solution loaded")
+        if not self.has_wcs():
+            raise AttributeError("no 'wcs' solution loaded")
+        if "wcs_xy" not in self._columns:
+            self._columns["wcs_xy"] = np.asarray(self.wcs.world2pix(self.ra,self.dec)).T
+        return self._columns["wcs_xy"]
 
     # ----------------------
     # - Alone Object
     def define_around(self,ang_distance):
+        """ count, for each entry, the number of entries (itself included) within
+        `ang_distance` (astropy Quantity or degree). The FoV cut counts only
+        consider the entries in the FoV. (One self-match of the full catalogue)
         """
-        """
-        # -- FoV cut
-        idxcatalogue = self.sky_radec.search_around_sky(self.sky_radec,
-                                                        ang_distance)[0]
-        self._derived_properties["naround"] = np.bincount(idxcatalogue)
+        pairs = np.asarray(list(self.get_kdtree(infov=False).query_pairs(
+            deg_to_chord(units.Quantity(ang_distance, "degree").value))),
+                           dtype=int).reshape(-1,2)
         # -- no FoV cut
-        _idxcatalogue = self._sky_radec.search_around_sky(self._sky_radec,
-                                                        ang_distance)[0]
-        self._derived_properties["naround_nofovcut"] = np.bincount(_idxcatalogue)
+        self._derived_properties["naround_nofovcut"] = \
+          1 + np.bincount(pairs.ravel(), minlength=len(self._ra))
+        # -- FoV cut: pairs of entries both in the FoV
+        fovmask = np.asarray(self.fovmask, dtype=bool)
+        fovindex = np.cumsum(fovmask)-1
+        pairs = pairs[fovmask[pairs[:,0]] & fovmask[pairs[:,1]]]
+        self._derived_properties["naround"] = \
+          1 + np.bincount(fovindex[pairs].ravel(), minlength=fovmask.sum())
+        self.reset_mask_cache()
         
     def _is_around_defined(self):
         return self._derived_properties["naround"] is not None
@@ -0,0 +1,253 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Local (on disk) cache of the downloaded catalogues """
+
+import os
+import time
+import json
+import hashlib
+import sqlite3
+import threading
+import warnings
+import numpy as np
+
+from astropy.table import Table, Column, MaskedColumn
+
+from ..utils.tools import radec_to_xyz, chord_to_deg
+
+__all__ = ["CatalogueCache"]
+
+
+def radius_to_degree(radius):
+    """ converts a vizier-like radius ('0.5d', '30m', '10s' or a float in degree)
+    in degree """
+    if type(radius) is not str:
+        return float(radius)
+    for unit, scale in [["d",1.], ["m",1/60.], ["s",1/3600.]]:
+        if radius.endswith(unit):
+            return float(radius[:-1])*scale
+    return float(radius)
+
+class CatalogueCache( object ):
+    """ Cache of the catalogues downloaded by fetch_catalogue.
+
+    Each downloaded cone is recorded (npz, one array per column) together with the
+    query that produced it (source, extra columns, column filters and query options).
+    A requested cone contained in a cached cone of the same query is cut out locally
+    from the cached one and the catalogue server is not queried.
+    Once the cache exceeds `maxbytes`, the least recently used cones are removed.
+
+    The catalogues that reached the row limit of their survey (see
+    catalogues.ROW_LIMITS) could be incomplete: they are not cached.
+
+    The cache can be used by several threads (the downloads are not serialized).
+    """
+    def __init__(self, directory, maxbytes=None, padding=1.):
+        """
+        Parameters
+        ----------
+        directory: [string]
+            where the cached cones are stored (created if needed)
+
+        maxbytes: [int/None] -optional-
+            maximum size (in bytes) of the cached cones. None means no limit.
+
+        padding: [float] -optional-
+            the cones downloaded are `padding` times larger than the requested ones
+            so that the close by requests (e.g. overlapping images) are served from
+            the cache.
+        """
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        self.maxbytes  = maxbytes
+        self.padding   = padding
+        self.hits, self.misses = 0, 0
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(os.path.join(directory, "cones.db"),
+                                           check_same_thread=False)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS cones ("
+                                 "file TEXT PRIMARY KEY, querykey TEXT, ra REAL, dec REAL,"
+                                 "radius REAL, nbytes INTEGER, atime REAL, catalogue TEXT)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS cones_query ON cones (querykey)")
+        self._connection.commit()
+
+    def close(self):
+        """ close the connection to the database """
+        self._connection.close()
+
+    # =================== #
+    #   Methods           #
+    # =================== #
+    def fetch(self, fetcher, source, radec, radius, extracolumns=[],
+              column_filters={}, **kwargs):
+        """ Catalogue of the given cone, from the cache if possible, otherwise
+        from fetcher(source, radec, radius, extracolumns=extracolumns,
+        column_filters=column_filters, **kwargs) (see instrument.fetch_catalogue)
+
+        Parameters
+        ----------
+        fetcher: [function]
+            the downloading function.
+
+        source, radec, radius, extracolumns, column_filters, **kwargs:
+            the query (see instrument.fetch_catalogue)
+
+        Returns
+        -------
+        Catalogue
+        """
+        ra, dec = np.asarray(radec.split() if type(radec) is str else radec, dtype="float")
+        radius_deg = radius_to_degree(radius)
+        querykey = self.get_querykey(source, extracolumns, column_filters, **kwargs)
+
+        with self._lock:
+            cone = self.get_cone(querykey, ra, dec, radius_deg)
+            if cone is not None:
+                self.hits += 1
+                return self._read_cone_(cone, ra, dec, radius_deg)
+            self.misses += 1
+            
+        catalogue = fetcher(source, "%f %f"%(ra, dec), "%fd"%(radius_deg*self.padding),
+                            extracolumns=extracolumns, column_filters=column_filters,
+                            **kwargs)
+        from .catalogues import is_truncated
+        if is_truncated(source, catalogue):
+            warnings.warn("the %s catalogue reached its row limit and is not cached"%source)
+            # - the requested cone, not the padded one (as from the cache)
+            return self._cut_catalogue_(catalogue.data, catalogue.__class__,
+                                        catalogue._build_properties, ra, dec, radius_deg)
+        with self._lock:
+            cone = self._write_cone_(querykey, ra, dec, radius_deg*self.padding, catalogue)
+            catalogue = self._read_cone_(cone, ra, dec, radius_deg)
+            self._evict_()
+        return catalogue
+
+    @staticmethod
+    def get_querykey(source, extracolumns=[], column_filters={}, **kwargs):
+        """ identifier of the query (all but the cone) """
+        query = json.dumps([source.lower(), sorted(extracolumns),
+                            sorted([[k,str(v)] for k,v in column_filters.items()]),
+                            sorted([[k,str(v)] for k,v in kwargs.items()])])
+        return hashlib.sha1(query).hexdigest()
+
+    def get_cone(self, querykey, ra, dec, radius):
+        """ cached cone (dict) of the given query containing the given cone
+        (the smallest one). None if no cone contains it. """
+        cones = [dict(zip(["file","ra","dec","radius","catalogue"], row)) for row in
+                 self._connection.execute("SELECT file, ra, dec, radius, catalogue FROM cones"
+                                          " WHERE querykey=? AND radius>=?", (querykey, radius))]
+        if len(cones) == 0:
+            return None
+
+        dist = chord_to_deg(np.sqrt(np.sum((radec_to_xyz([c_["ra"] for c_ in cones],
+                                                          [c_["dec"] for c_ in cones])
+                                            - radec_to_xyz(ra, dec))**2, axis=1)))
+        contains = np.argwhere(dist + radius <= np.asarray([c_["radius"] for c_ in cones])).ravel()
+        if len(contains) == 0:
+            return None
+        return cones[contains[np.argmin([cones[i]["radius"] for i in contains])]]
+
+    def clear(self):
+        """ remove all the cached cones """
+        with self._lock:
+            for (filename,) in self._connection.execute("SELECT file FROM cones").fetchall():
+                self._remove_cone_(filename)
+            self._connection.commit()
+
+    # =================== #
+    #   Internal          #
+    # =================== #
+    def _write_cone_(self, querykey, ra, dec, radius, catalogue):
+        """ records the catalogue of the given cone """
+        filename = "%s_%.6f_%.6f_%.6f.npz"%(querykey[:12], ra, dec, radius)
+        table = catalogue.data
+        arrays = {"names":np.asarray(table.colnames)}
+        for i, name in enumerate(table.colnames):
+            arrays["c%d"%i] = np.asarray(table[name])
+            if hasattr(table[name], "mask") and np.any(table[name].mask):
+                arrays["m%d"%i] = np.asarray(table[name].mask)
+            if table[name].unit is not None:
+                arrays["u%d"%i] = np.asarray(str(table[name].unit))
+        np.savez(os.path.join(self.directory, filename), **arrays)
+
+        description = json.dumps({"class":catalogue.__class__.__name__,
+                                  "build":catalogue._build_properties})
+        self._connection.execute("INSERT OR REPLACE INTO cones VALUES (?,?,?,?,?,?,?,?)",
+                                 (filename, querykey, ra, dec, radius,
+                                  os.path.getsize(os.path.join(self.directory, filename)),
+                                  time.time(), description))
+        self._connection.commit()
+        return {"file":filename, "ra":ra, "dec":dec, "radius":radius, "catalogue":description}
+
+    def _read_cone_(self, cone, ra, dec, radius):
+        """ Catalogue of the entries of the cached cone within radius of ra, dec """
+        from . import catalogues
+        from .baseinstrument import Catalogue
+        self._connection.execute("UPDATE cones SET atime=? WHERE file=?", (time.time(), cone["file"]))
+        self._connection.commit()
+
+        arrays = np.load(os.path.join(self.directory, cone["file"]))
+        try:
+            columns = []
+            for i, name in enumerate(arrays["names"]):
+                unit = str(arrays["u%d"%i]) if "u%d"%i in arrays.files else None
+                if "m%d"%i in arrays.files:
+                    columns.append(MaskedColumn(arrays["c%d"%i], name=name, unit=unit,
+                                                mask=arrays["m%d"%i]))
+                else:
+                    columns.append(Column(arrays["c%d"%i], name=name, unit=unit))
+        finally:
+            arrays.close()
+        table = Table(columns)
+
+        description = json.loads(cone["catalogue"])
+        build = {str(k):v for k,v in description["build"].items()}
+        return self._cut_catalogue_(table, getattr(catalogues, description["class"], Catalogue),
+                                    build, ra, dec, radius)
+
+    @staticmethod
+    def _cut_catalogue_(table, catclass, build, ra, dec, radius):
+        """ catclass Catalogue of the entries of the table within radius of ra, dec """
+        if len(table) > 0:
+            xyz = radec_to_xyz(np.asarray(table[build["key_ra"]], dtype="float"),
+                               np.asarray(table[build["key_dec"]], dtype="float"))
+            table = table[chord_to_deg(np.sqrt(np.sum((xyz-radec_to_xyz(ra, dec))**2, axis=1)))
+                          <= radius]
+        catalogue = catclass(empty=True)
+        catalogue.create(table, None, **build)
+        return catalogue
+
+    def _evict_(self):
+        """ removes the least recently used cones until the size is below maxbytes """
+        if self.maxbytes is None:
+            return
+        rows = self._connection.execute("SELECT file, nbytes FROM cones ORDER BY atime").fetchall()
+        nbytes = np.sum([n_ for f_,n_ in rows])
+        for filename, size in rows:
+            if nbytes <= self.maxbytes:
+                break
+            self._remove_cone_(filename)
+            nbytes -= size
+        self._connection.commit()
+
+    def _remove_cone_(self, filename):
+        """ remove the given cone from the cache (not committed) """
+        path = os.path.join(self.directory, filename)
+        if os.path.isfile(path):
+            os.remove(path)
+        self._connection.execute("DELETE FROM cones WHERE file=?", (filename,))
+
+    # =================== #
+    #   Properties        #
+    # =================== #
+    @property
+    def nbytes(self):
+        """ size (in bytes) of the cached cones """
+        return self._connection.execute("SELECT COALESCE(SUM(nbytes),0) FROM cones").fetchone()[0]
+
+    @property
+    def ncones(self):
+        """ number of cached cones """
+        return self._connection.execute("SELECT COUNT(*) FROM cones").fetchone()[0]
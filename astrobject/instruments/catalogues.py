@@ -6,9 +6,18 @@ import numpy as np
     
 from .baseinstrument import Catalogue, coordinates, units
 # -- here load all the object that could be parsed
-from ..utils.tools import kwargs_update
+from ..utils.tools import kwargs_update, radec_to_xyz, deg_to_chord, chord_to_deg
 from ..utils.decorators import _autogen_docstring_inheritance, make_method
 
+# Maximum number of entries returned by a query of these surveys
+# (larger cones are truncated)
+ROW_LIMITS = {"2mass":100000, "wise":100000, "panstarrs":10000}
+
+def is_truncated(source, catalogue):
+    """ test if the given catalogue (downloaded from `source`) reached
+    the row limit of the query, i.e. if it could be incomplete """
+    return source.lower() in ROW_LIMITS and \
+      catalogue.data is not None and len(catalogue.data) >= ROW_LIMITS[source.lower()]
 
 
 # ============================= #
@@ -42,6 +51,123 @@ def stellar_density( catalogue, mask=None,
     return np.bincount(skyradec.search_around_sky(skyradec,angdist)[0])
 
 
+# ============================= #
+#                               #
+# Cross Matching                #
+#                               #
+# ============================= #
+def crossmatch_catalogues(catalogues, radius, runits="arcsec", names=None,
+                          keep_unmatched=True):
+    """ merge the given catalogues (e.g. sdss, 2mass, wise and gaia) by matching
+    their entries by position.
+
+    The catalogues are matched in the given order: the entries of a catalogue are
+    matched to the nearest merged entry within `radius`. When several entries are
+    matched to the same one, only the nearest is kept. The position of a merged
+    entry is that of the first catalogue it comes from.
+    (The full catalogues are used, not only their FoV entries. Empty catalogues
+    give fully masked columns.)
+
+    Each catalogue costs one KD-tree build and one nearest neighbor query per
+    merged entry, so the merge scales as N log(N) with the number of entries.
+
+    Parameters
+    ----------
+    catalogues: [list of Catalogue]
+        the catalogues to merge.
+
+    radius: [float]
+        the matching radius (in `runits`)
+
+    runits: [string] -optional-
+        unit of the radius (astropy units)
+
+    names: [list of string] -optional-
+        prefix of the columns of each catalogue (<name>_<column>).
+        By default the lower-case source_name of the catalogues (made unique).
+
+    keep_unmatched: [bool] -optional-
+        keep the entries of the other catalogues without counterpart in the
+        previous ones (outer merge). Otherwise only the entries of the first
+        catalogue are kept.
+
+    Returns
+    -------
+    Catalogue (columns 'ra', 'dec' of the merged entries, the <name>_<column>
+    columns (masked when there is no counterpart) and <name>_sep, the distance
+    (arcsec) to the merged position, also masked)
+    """
+    from scipy.spatial import cKDTree
+    from astropy.table import Table, MaskedColumn
+    if names is None:
+        names = [c_.source_name.lower() if c_.source_name != "_not_defined_" else "cat"
+                 for c_ in catalogues]
+        names = [n_ if names.count(n_) == 1 else "%s%d"%(n_,i) for i,n_ in enumerate(names)]
+    if len(names) != len(catalogues) or len(set(names)) != len(names):
+        raise ValueError("names must be unique and one per catalogue")
+    maxchord = deg_to_chord((radius*units.Unit(runits)).to("degree").value)
+
+    # -- merged entries: position and index in each catalogue (-1 when absent)
+    xyz = radec_to_xyz(np.asarray(catalogues[0]._ra, dtype="float"),
+                       np.asarray(catalogues[0]._dec, dtype="float"))
+    ra, dec = np.asarray(catalogues[0]._ra, dtype="float"), np.asarray(catalogues[0]._dec, dtype="float")
+    index = [np.arange(len(ra))]
+    sep   = [np.zeros(len(ra))]
+    for catalogue in catalogues[1:]:
+        # - nearest entry of this catalogue for each merged entry
+        if len(catalogue.data) == 0 or len(xyz) == 0:
+            # (nothing to match: no kdtree query)
+            dist, idx = np.inf*np.ones(len(xyz)), len(catalogue.data)*np.ones(len(xyz), dtype=int)
+        else:
+            dist, idx = catalogue.get_kdtree(infov=False).query(xyz, distance_upper_bound=maxchord)
+        matched = np.argwhere(np.isfinite(dist)).ravel()
+        # - one-to-many: the nearest merged entry gets the entry
+        matched = matched[np.argsort(dist[matched], kind="mergesort")]
+        matched = matched[np.unique(idx[matched], return_index=True)[1]]
+        catindex = -np.ones(len(xyz), dtype=int)
+        catindex[matched] = idx[matched]
+        catsep = np.zeros(len(xyz))
+        catsep[matched] = dist[matched]
+        
+        if keep_unmatched:
+            new = np.ones(len(catalogue.data), dtype=bool)
+            new[idx[matched]] = False
+            new = np.argwhere(new).ravel()
+            ranew, decnew = [np.asarray(v_, dtype="float")[new] for v_ in [catalogue._ra, catalogue._dec]]
+            xyz = np.concatenate([xyz, radec_to_xyz(ranew, decnew)])
+            ra, dec = np.concatenate([ra, ranew]), np.concatenate([dec, decnew])
+            index = [np.concatenate([i_, -np.ones(len(new), dtype=int)]) for i_ in index]
+            sep   = [np.concatenate([s_, np.zeros(len(new))]) for s_ in sep]
+            catindex, catsep = np.concatenate([catindex, new]), np.concatenate([catsep, np.zeros(len(new))])
+            
+        index.append(catindex)
+        sep.append(catsep)
+        
+    # -- the merged table
+    columns = [MaskedColumn(ra, name="ra", unit="deg"), MaskedColumn(dec, name="dec", unit="deg")]
+    for catalogue, name, idx, dist in zip(catalogues, names, index, sep):
+        missing = idx < 0
+        rows = np.where(missing, 0, idx)
+        for colname in catalogue.data.colnames:
+            column = catalogue.data[colname]
+            if len(column) == 0:
+                # - empty catalogue: fully masked column
+                columns.append(MaskedColumn(np.zeros(len(idx), dtype=column.dtype),
+                                            mask=np.ones(len(idx), dtype=bool), unit=column.unit,
+                                            name="%s_%s"%(name, colname)))
+                continue
+            mask = missing if not hasattr(column, "mask") else \
+              missing | np.asarray(column.mask)[rows]
+            columns.append(MaskedColumn(np.asarray(column)[rows], mask=mask, unit=column.unit,
+                                        name="%s_%s"%(name, colname)))
+        columns.append(MaskedColumn(chord_to_deg(dist)*3600, mask=missing, unit="arcsec",
+                                    name="%s_sep"%name))
+        
+    merged = Catalogue(empty=True)
+    merged.create(Table(columns, copy=False), None, copy_data=False, key_ra="ra", key_dec="dec")
+    return merged
+
+
 
 
 #################################
@@ -51,7 +177,7 @@ def stellar_density( catalogue, mask=None,
 #################################
 def panstarrs_query(ra_deg, dec_deg, rad_deg,
                     mindet=1, 
-                    maxsources=10000,
+                    maxsources=ROW_LIMITS["panstarrs"],
                     server=('https://archive.stsci.edu/'+
                             'panstarrs/search.php')): 
     """
@@ -384,7 +510,7 @@ def fetch_2mass_catalogue(center,radius,extracolumns=[],
     # - WARNING if discovered that some of the bandmag were missing if too many colums requested
     c = vizier.Vizier(catalog="II/246", columns=columns, column_filters=column_filters,
                       **kwargs)
-    c.ROW_LIMIT = 100000
+    c.ROW_LIMIT = ROW_LIMITS["2mass"]
     try:
         t = c.query_region(center,radius=radius).values()[0]
     except:
@@ -509,7 +635,7 @@ def fetch_wise_catalogue(center,radius,extracolumns=[],column_filters={"Jmag":"5
     # - WARNING if discovered that some of the bandmag were missing if too many colums requested
     c = vizier.Vizier(catalog="II/328", columns=columns, column_filters=column_filters,
                       **kwargs)
-    c.ROW_LIMIT = 100000
+    c.ROW_LIMIT = ROW_LIMITS["wise"]
     try:
         t = c.query_region(center,radius=radius).values()[0]
     except:
@@ -562,3 +688,22 @@ class WISECatalogue( Catalogue ):
         return super(WISECatalogue,self).mag
 
     
+
+
+# ============================= #
+#                               #
+# Survey Registry               #
+#                               #
+# ============================= #
+# Catalogue class and build keys of the surveys as returned by their
+# fetch_*_catalogue (used to rebuild catalogues stored locally, see cataloguestore)
+SURVEY_CATALOGUES = {
+    "sdss":      [SDSSCatalogue, dict(key_class="cl", value_star=6, key_id="objID",
+                                      key_ra="RAJ2000", key_dec="DEJ2000")],
+    "2mass":     [MASSCatalogue, dict(key_class="PointSource", value_star=None,
+                                      key_ra="RAJ2000", key_dec="DEJ2000")],
+    "wise":      [WISECatalogue, dict(key_class="ToBeDone", value_star=None,
+                                      key_ra="RAJ2000", key_dec="DEJ2000")],
+    "gaia":      [GAIACatalogue, dict(key_ra="RA_ICRS", key_dec="DE_ICRS")],
+    "panstarrs": [PanSTARRSCatalogue, dict(key_ra="raMean", key_dec="decMean")],
+    }
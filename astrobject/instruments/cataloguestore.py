@@ -0,0 +1,241 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Local catalogue store partitioned in HEALPix tiles """
+
+import os
+import json
+import shutil
+import numpy as np
+
+from astropy.table import Table, Column, MaskedColumn
+
+try:
+    import healpy as hp
+    HEALPY_IMPORTED = True
+except ImportError:
+    HEALPY_IMPORTED = False
+
+__all__ = ["CatalogueStore"]
+
+_d2r = np.pi / 180
+
+
+# =========================== #
+#   Columnar tables           #
+# =========================== #
+def write_columns(directory, table):
+    """ writes the given table in the directory, one .npy file per column
+    (and per mask) and a columns.json description of the columns """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    description = []
+    for i, name in enumerate(table.colnames):
+        column = table[name]
+        np.save(os.path.join(directory, "c%d.npy"%i), np.asarray(column))
+        masked = hasattr(column, "mask") and np.any(column.mask)
+        if masked:
+            np.save(os.path.join(directory, "m%d.npy"%i), np.asarray(column.mask))
+        description.append({"name":name, "masked":bool(masked),
+                            "unit":None if column.unit is None else str(column.unit)})
+    json.dump(description, open(os.path.join(directory, "columns.json"), "w"))
+
+def read_columns(directory, mmap_mode=None):
+    """ reads the table written by write_columns.
+    With mmap_mode (e.g. 'r') the columns are memory mapped and not copied. """
+    description = json.load(open(os.path.join(directory, "columns.json")))
+    columns = []
+    for i, column in enumerate(description):
+        data = np.load(os.path.join(directory, "c%d.npy"%i), mmap_mode=mmap_mode)
+        if column["masked"]:
+            columns.append(MaskedColumn(data, name=column["name"], unit=column["unit"], copy=False,
+                                        mask=np.load(os.path.join(directory, "m%d.npy"%i))))
+        else:
+            columns.append(Column(data, name=column["name"], unit=column["unit"], copy=False))
+    return Table(columns, copy=False)
+
+def concatenate_tables(tables):
+    """ concatenates tables sharing the same columns (masks are kept) """
+    if len(tables) == 1:
+        return tables[0]
+    colnames = tables[0].colnames
+    if np.any([t_.colnames != colnames for t_ in tables[1:]]):
+        raise ValueError("the tables to concatenate do not have the same columns")
+    columns = []
+    for name in colnames:
+        data = np.concatenate([np.asarray(t_[name]) for t_ in tables])
+        if np.any([hasattr(t_[name], "mask") for t_ in tables]):
+            mask = np.concatenate([np.asarray(t_[name].mask) if hasattr(t_[name], "mask")
+                                   else np.zeros(len(t_), dtype=bool) for t_ in tables])
+            columns.append(MaskedColumn(data, name=name, unit=tables[0][name].unit, mask=mask))
+        else:
+            columns.append(Column(data, name=name, unit=tables[0][name].unit))
+    return Table(columns)
+
+
+# =========================== #
+#   Store                     #
+# =========================== #
+class CatalogueStore( object ):
+    """ Local copy of survey catalogues (see catalogues.SURVEY_CATALOGUES) partitioned
+    in HEALPix tiles (nested scheme): one directory per tile and per survey
+    containing one .npy file per column.
+
+    The catalogue of a given footprint (wcs solution) or cone is built from the tiles
+    overlapping it only, so its cost depends on the footprint and not on the size
+    of the survey.
+    """
+    def __init__(self, directory, nside=None):
+        """
+        Parameters
+        ----------
+        directory: [string]
+            root of the store (created if needed)
+
+        nside: [int/None] -optional-
+            HEALPix NSIDE of the tiles. None means 32 (tiles of ~1.8deg) for a new
+            store and the recorded value of an existing one.
+        """
+        if not HEALPY_IMPORTED:
+            raise ImportError("CatalogueStore requires the healpy package.")
+        self.directory = directory
+        infofile = os.path.join(directory, "store.json")
+        if os.path.isfile(infofile):
+            recorded = json.load(open(infofile))["nside"]
+            if nside is not None and nside != recorded:
+                raise ValueError("the store %s has nside=%d (%d given)"%(directory, recorded, nside))
+            nside = recorded
+        else:
+            nside = 32 if nside is None else nside
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            json.dump({"nside":nside}, open(infofile, "w"))
+        self.nside = nside
+
+    # =================== #
+    #   Methods           #
+    # =================== #
+    def ingest(self, survey, data):
+        """ add the given catalogue entries to the store.
+        The entries are appended to the existing tiles.
+
+        Parameters
+        ----------
+        survey: [string]
+            name of the survey (key of catalogues.SURVEY_CATALOGUES)
+
+        data: [Catalogue/Table/string]
+            the entries: Catalogue, astropy Table (with the coordinate columns of the
+            survey) or a file readable by the survey Catalogue class.
+
+        Returns
+        -------
+        list (the updated tiles)
+        """
+        catclass, build = self._get_survey_(survey)
+        if type(data) is str:
+            filename, data = data, catclass(empty=True)
+            data.load(filename, **build)
+        if not isinstance(data, Table):
+            data = data.data
+        if len(data) == 0:
+            return []
+
+        pixels = self.radec_to_tile(np.asarray(data[build["key_ra"]], dtype="float"),
+                                    np.asarray(data[build["key_dec"]], dtype="float"))
+        order = np.argsort(pixels, kind="mergesort")
+        tiles, starts = np.unique(pixels[order], return_index=True)
+        for tile, rows in zip(tiles, np.split(order, starts[1:])):
+            directory = self._get_tile_directory_(survey, tile)
+            table = data[rows]
+            if os.path.isdir(directory):
+                table = concatenate_tables([read_columns(directory), table])
+                shutil.rmtree(directory)
+            write_columns(directory, table)
+        return list(tiles)
+
+    def get_catalogue(self, survey, wcs=None, radec=None, radius=None, mmap=False):
+        """ Catalogue of the given survey built from the tiles overlapping the
+        given footprint or cone (the catalogue is not cut to it, see set_fovmask)
+
+        Parameters
+        ----------
+        survey: [string]
+            name of the survey (key of catalogues.SURVEY_CATALOGUES)
+
+        wcs: [wcs solution] -optional-
+            the footprint of the image of this wcs solution.
+            (if given, the catalogue's wcs is set)
+
+        radec, radius: [2-array, float] -optional-
+            the cone (in degree) if no wcs is given.
+
+        mmap: [bool] -optional-
+            memory map the columns instead of reading them. This only applies if
+            the footprint overlaps a single tile (otherwise the tiles are concatenated)
+
+        Returns
+        -------
+        Catalogue
+        """
+        catclass, build = self._get_survey_(survey)
+        if wcs is not None:
+            tiles = self.get_footprint_tiles(wcs)
+        elif radec is not None and radius is not None:
+            tiles = self.get_cone_tiles(radec[0], radec[1], radius)
+        else:
+            raise ValueError("Either wcs or radec and radius must be provided")
+
+        tables = [read_columns(d_, mmap_mode="r" if mmap else None) for d_ in
+                  [self._get_tile_directory_(survey, t_) for t_ in tiles] if os.path.isdir(d_)]
+        catalogue = catclass(empty=True)
+        if len(tables) == 0:
+            return catalogue
+
+        catalogue.create(concatenate_tables(tables), None, copy_data=not mmap, **build)
+        if wcs is not None:
+            catalogue.set_wcs(wcs)
+        return catalogue
+
+    # ------------ #
+    # - Tiles    - #
+    # ------------ #
+    def radec_to_tile(self, ra, dec):
+        """ tiles of the given coordinates (deg) """
+        return hp.ang2pix(self.nside, (90-np.asarray(dec))*_d2r, np.asarray(ra)*_d2r, nest=True)
+
+    def get_cone_tiles(self, ra, dec, radius):
+        """ tiles overlapping the given cone (degree) """
+        return hp.query_disc(self.nside, hp.ang2vec((90-dec)*_d2r, ra*_d2r), radius*_d2r,
+                             inclusive=True, nest=True)
+
+    def get_footprint_tiles(self, wcs):
+        """ tiles overlapping the footprint of the image of the given wcs solution """
+        height, width = wcs.image_height, wcs.image_width
+        ra, dec = np.asarray([wcs.pix2world(x_,y_) for x_,y_ in
+                              [[0,0],[height,0],[height,width],[0,width]]]).reshape(4,2).T
+        return hp.query_polygon(self.nside, hp.ang2vec((90-dec)*_d2r, ra*_d2r),
+                                inclusive=True, nest=True)
+
+    def get_tiles(self, survey):
+        """ tiles of the store for the given survey """
+        directory = os.path.join(self.directory, survey.lower())
+        if not os.path.isdir(directory):
+            return []
+        return sorted([int(d_) for d_ in os.listdir(directory) if d_.isdigit()])
+
+    # =================== #
+    #   Internal          #
+    # =================== #
+    @staticmethod
+    def _get_survey_(survey):
+        """ catalogue class and build keys of the given survey """
+        from .catalogues import SURVEY_CATALOGUES
+        if survey.lower() not in SURVEY_CATALOGUES.keys():
+            raise ValueError("unknown survey %s. Known surveys: "%survey+
+                             ", ".join(SURVEY_CATALOGUES.keys()))
+        return SURVEY_CATALOGUES[survey.lower()]
+
+    def _get_tile_directory_(self, survey, tile):
+        """ directory of the given tile """
+        return os.path.join(self.directory, survey.lower(), "%d"%tile)
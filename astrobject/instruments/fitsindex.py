@@ -0,0 +1,245 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Persistent (sqlite) index of the metadata of fits exposures """
+
+import os
+import json
+import sqlite3
+import fnmatch
+import warnings
+import numpy as np
+
+from astropy.io import fits as pf
+
+from .baseinstrument import get_header
+
+__all__ = ["FitsIndex"]
+
+
+INDEX_COLUMNS = ["path","mtime","size","instrument","bandname","mjd","dataindex",
+                 "header","ra_min","ra_max","dec_min","dec_max","footprint"]
+
+class FitsIndex( object ):
+    """ Index of a tree of fits files stored in a sqlite database.
+    For each file it records the instrument, bandname, mjd, the data extension,
+    the header of the data extension (to rebuild the wcs solution) and the
+    sky footprint. The index is updated incrementally: only new files and files
+    whose modification time or size changed are read again.
+
+    Files that are not of a known instrument are recorded too (instrument=None)
+    so that they are not read again.
+    """
+    def __init__(self, dbfile):
+        """
+        Parameters
+        ----------
+        dbfile: [string]
+            sqlite file of the index (created if it does not exist)
+        """
+        self.dbfile = dbfile
+        self._connection = sqlite3.connect(dbfile)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS files ("
+                                 "path TEXT PRIMARY KEY, mtime REAL, size INTEGER,"
+                                 "instrument TEXT, bandname TEXT, mjd REAL, dataindex INTEGER,"
+                                 "header TEXT, ra_min REAL, ra_max REAL,"
+                                 "dec_min REAL, dec_max REAL, footprint TEXT)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS files_instrument "
+                                 "ON files (instrument, bandname)")
+        self._connection.commit()
+
+    def close(self):
+        """ close the connection to the database """
+        self._connection.close()
+
+    # =================== #
+    #   Methods           #
+    # =================== #
+    def scan(self, directory, pattern="*.fits*", recursive=True, prune=True,
+             verbose=False):
+        """ Index the fits files of the directory tree.
+
+        Parameters
+        ----------
+        directory: [string]
+            root of the files to index.
+
+        pattern: [string] -optional-
+            Shell-like pattern of the file names to index.
+
+        recursive: [bool] -optional-
+            Should the sub directories be scanned?
+
+        prune: [bool] -optional-
+            Remove from the index the files of this directory that no longer exist.
+
+        verbose: [bool] -optional-
+            Warn for the files that could not be read.
+
+        Returns
+        -------
+        dict (number of 'added', 'updated', 'unchanged' and 'removed' files)
+        """
+        directory = os.path.abspath(directory)
+        # (LIKE wildcards may match other directories, hence the startswith)
+        known  = {path:(mtime,size) for path,mtime,size in self._connection.execute(
+            "SELECT path, mtime, size FROM files WHERE path LIKE ?", (directory+os.sep+"%",))
+            if path.startswith(directory+os.sep)}
+        counts = {"added":0, "updated":0, "unchanged":0, "removed":0}
+        found  = set()
+        for root, dirs, files in os.walk(directory):
+            if not recursive:
+                dirs[:] = []
+            for filename in fnmatch.filter(files, pattern):
+                path = os.path.join(root, filename)
+                found.add(path)
+                stat = os.stat(path)
+                if path in known and known[path] == (stat.st_mtime, stat.st_size):
+                    counts["unchanged"] += 1
+                    continue
+                self._write_entry_(self._read_entry_(path, stat, verbose=verbose))
+                counts["updated" if path in known else "added"] += 1
+
+        if prune:
+            removed = [path for path in known.keys() if path not in found]
+            self._connection.executemany("DELETE FROM files WHERE path=?", [(p,) for p in removed])
+            counts["removed"] = len(removed)
+
+        self._connection.commit()
+        return counts
+
+    def index_file(self, filename):
+        """ (re-)index the given file """
+        path = os.path.abspath(filename)
+        self._write_entry_(self._read_entry_(path, os.stat(path), verbose=True))
+        self._connection.commit()
+
+    def get_entries(self, instrument=None, bandname=None, mjd_range=None,
+                    radec=None, known_only=True):
+        """ Indexed files matching the given selection.
+
+        Parameters
+        ----------
+        instrument, bandname: [string/None] -optional-
+            Only the files of this instrument / band.
+
+        mjd_range: [2-array/None] -optional-
+            [min, max] of the observing date.
+
+        radec: [2-array/None] -optional-
+            Only the files whose footprint bounding box contains this coordinate (deg).
+
+        known_only: [bool] -optional-
+            Only the files of a known instrument.
+
+        Returns
+        -------
+        list of dict (one per file, see INDEX_COLUMNS)
+        """
+        conditions, values = [], []
+        if known_only:
+            conditions.append("instrument IS NOT NULL")
+        for key, value in [["instrument",instrument],["bandname",bandname]]:
+            if value is not None:
+                conditions.append("%s=?"%key)
+                values.append(value)
+        if mjd_range is not None:
+            conditions.append("mjd BETWEEN ? AND ?")
+            values += list(mjd_range)
+        if radec is not None:
+            # footprints across ra=0 are recorded with ra_min<0 (see _read_entry_)
+            conditions.append("(? BETWEEN ra_min AND ra_max OR ? BETWEEN ra_min AND ra_max)"
+                              " AND ? BETWEEN dec_min AND dec_max")
+            values += [radec[0], radec[0]-360, radec[1]]
+
+        query = "SELECT %s FROM files"%(", ".join(INDEX_COLUMNS))
+        if len(conditions)>0:
+            query += " WHERE "+" AND ".join(conditions)
+        return [dict(zip(INDEX_COLUMNS, row))
+                for row in self._connection.execute(query+" ORDER BY path", values)]
+
+    def get_entry(self, filename):
+        """ index entry (dict) of the given file (None if not indexed) """
+        row = self._connection.execute("SELECT %s FROM files WHERE path=?"%(", ".join(INDEX_COLUMNS)),
+                                       (os.path.abspath(filename),)).fetchone()
+        return None if row is None else dict(zip(INDEX_COLUMNS, row))
+
+    def get_wcs(self, filename):
+        """ wcs solution of the given file, built from the indexed header
+        (the fits file is not read) """
+        return self.get_entry_wcs(self.get_entry(filename))
+
+    @staticmethod
+    def get_entry_wcs(entry):
+        """ wcs solution built from the header of the given index entry
+        (None if the entry has no header) """
+        from .. import astrometry
+        if entry is None or entry["header"] is None:
+            return None
+        return astrometry.wcs(header=pf.Header.fromstring(entry["header"]))
+
+    # =================== #
+    #   Internal          #
+    # =================== #
+    def _read_entry_(self, path, stat, verbose=False):
+        """ read the metadata of the given file """
+        from . import instrument as inst
+        entry = dict(zip(INDEX_COLUMNS, [None]*len(INDEX_COLUMNS)))
+        entry.update(path=path, mtime=stat.st_mtime, size=stat.st_size)
+        try:
+            name = inst.which_instrument(path)
+        except Exception as e:
+            if verbose:
+                warnings.warn("cannot read %s (%s)"%(path, e))
+            return entry
+        if name is None:
+            return entry
+
+        module = inst.INSTRUMENT_REGISTRY[name]
+        entry.update(instrument=name, dataindex=module.DATAINDEX)
+        for key, func in [["bandname","which_band_is_file"],["mjd","which_obs_mjd"]]:
+            try:
+                entry[key] = getattr(module, func)(path)
+            except Exception:
+                pass
+
+        header = get_header(path, ext=module.DATAINDEX)
+        entry["header"] = header.tostring()
+        try:
+            ra, dec = self._get_footprint_(header)
+        except Exception as e:
+            if verbose:
+                warnings.warn("cannot derive the footprint of %s (%s)"%(path, e))
+            return entry
+
+        if np.max(ra)-np.min(ra) > 180:
+            # - across ra=0
+            ra = np.where(ra>180, ra-360, ra)
+        entry.update(ra_min=np.min(ra), ra_max=np.max(ra),
+                     dec_min=np.min(dec), dec_max=np.max(dec),
+                     footprint=json.dumps(np.asarray([ra,dec]).T.tolist()))
+        return entry
+
+    @staticmethod
+    def _get_footprint_(header):
+        """ ra, dec (deg) of the corners of the image """
+        from .. import astrometry
+        wcs = astrometry.wcs(header=header)
+        nx, ny = header["NAXIS1"], header["NAXIS2"]
+        return np.asarray([wcs.pix2world(x_, y_) for x_,y_ in
+                           [[0,0],[nx,0],[nx,ny],[0,ny]]]).reshape(4,2).T
+
+    def _write_entry_(self, entry):
+        """ insert or replace the given entry """
+        self._connection.execute("INSERT OR REPLACE INTO files (%s) VALUES (%s)"%(
+            ", ".join(INDEX_COLUMNS), ", ".join(["?"]*len(INDEX_COLUMNS))),
+            [entry[k] if not isinstance(entry[k], np.generic) else entry[k].item()
+             for k in INDEX_COLUMNS])
+
+    # =================== #
+    #   Properties        #
+    # =================== #
+    @property
+    def nfiles(self):
+        """ number of indexed files """
+        return self._connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
@@ -9,7 +9,7 @@ from astropy.io      import fits as pf
 from astropy         import time
 
 # - local dependencies
-from .baseinstrument    import Instrument
+from .baseinstrument    import Instrument, get_header
 from ..photometry       import get_photopoint
 from ..utils.decorators import _autogen_docstring_inheritance
 from ..utils.tools      import kwargs_update
@@ -37,7 +37,7 @@ def galex(*args,**kwargs):
 def is_galex_file(filename):
     """This test if the input file is a GALEX one. Test if 'MPSTYPE' is in the header """
     # not great but this is the structure of MJC images
-    return "MPSTYPE" in pf.getheader(filename).keys()
+    return "MPSTYPE" in get_header(filename).keys()
 
 def which_band_is_file(filename):
     """This resuts the band of the given file if it is a
@@ -52,7 +52,7 @@ def which_obs_mjd(filename):
     modified julian date """
     if not is_galex_file(filename):
         return None
-    h_ = pf.getheader(filename)
+    h_ = get_header(filename)
     return time.Time(h_["OBS-DATE"]+"T"+h_["TIME-OBS"]).mjd
 
 
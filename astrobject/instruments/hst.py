@@ -3,7 +3,7 @@
 import numpy as np
 from astropy.io import fits as pf
 from astropy.table import Table
-from .baseinstrument import Instrument
+from .baseinstrument import Instrument, get_header
 from ..utils.decorators import _autogen_docstring_inheritance
 from ..utils.tools import kwargs_update
 
@@ -43,14 +43,14 @@ def hst(*args,**kwargs):
 
 def is_hst_file(filename):
     """This test if the given file is an HST one"""
-    return pf.getheader(filename).get("TELESCOP") == "HST" 
+    return get_header(filename).get("TELESCOP") == "HST" 
 
 def which_band_is_file(filename):
     """
     """
     if not is_hst_file(filename):
         return None
-    return pf.getheader(filename).get("FILTER")
+    return get_header(filename).get("FILTER")
 
 
 def get_psf(wavelength_angstrom,show=True):
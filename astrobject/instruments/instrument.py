@@ -14,12 +14,98 @@ import galex
 import panstarrs
 import wise
 import twomass
-__all__ = ["get_instrument","get_catalogue","fetch_catalogue"]
+from .baseinstrument import get_header
+__all__ = ["get_instrument","get_catalogue","fetch_catalogue","set_catalogue_cache"]
 
 KNOWN_INSTRUMENTS = ["sdss","galex","hst","panstarrs","snifs","ptf","stella","wise","twomass"]
 
+# Dispatch registry: name -> module defining is_<name>_file(), which_band_is_file(),
+# DATAINDEX and the <name>() instrument loader.
+# The instrument tests read the headers through get_header, so a file header is
+# read once and shared by all the tests (see baseinstrument.HEADER_CACHE)
+INSTRUMENT_REGISTRY = {"sdss":sdss, "galex":galex, "hst":hst, "panstarrs":panstarrs,
+                       "snifs":snifs, "ptf":ptf, "stella":stella, "wise":wise,
+                       "twomass":twomass}
 
-def fetch_catalogue(source, radec, radius, extracolumns=[], column_filters={"rmag":"5..25"},**kwargs):
+def register_instrument(name, module, first=False):
+    """ Add an instrument to the known instruments.
+
+    Parameters
+    ----------
+    name: [string]
+        name of the instrument.
+
+    module: [module]
+        module defining is_`name`_file(filename), which_band_is_file(filename),
+        DATAINDEX and `name`(filename, **kwargs) returning the Instrument.
+
+    first: [bool] -optional-
+        Should this instrument be tested before the others?
+
+    Returns
+    -------
+    Void
+    """
+    INSTRUMENT_REGISTRY[name] = module
+    if name in KNOWN_INSTRUMENTS:
+        KNOWN_INSTRUMENTS.remove(name)
+    if first:
+        KNOWN_INSTRUMENTS.insert(0, name)
+    else:
+        KNOWN_INSTRUMENTS.append(name)
+
+def which_instrument(filename):
+    """ Name of the instrument the given file belongs to.
+    Returns None if this is not a known instrument file. """
+    for instrument in KNOWN_INSTRUMENTS:
+        if getattr(INSTRUMENT_REGISTRY[instrument], "is_%s_file"%instrument)(filename):
+            return instrument
+    return None
+
+def _get_instrument_module_(filename):
+    """ registered module of the given file's instrument (ValueError if unknown) """
+    instrument = which_instrument(filename)
+    if instrument is None:
+        raise ValueError("'filename' does not belong to a known instrument "+"\n"+\
+                         "these are:"+", ".join(KNOWN_INSTRUMENTS))
+    return INSTRUMENT_REGISTRY[instrument]
+
+
+# Local cache of the downloaded catalogues used by fetch_catalogue (see set_catalogue_cache)
+CATALOGUE_CACHE = None
+
+def set_catalogue_cache(directory, maxbytes=None, padding=1.):
+    """ Serve the fetch_catalogue requests from a local cache of the downloaded cones
+    (see cataloguecache.CatalogueCache). Set directory to None to stop using the cache.
+
+    Parameters
+    ----------
+    directory: [string/None]
+        where the catalogues are cached.
+
+    maxbytes: [int/None] -optional-
+        maximum size (in bytes) of the cache. None means no limit.
+
+    padding: [float] -optional-
+        The cones are downloaded `padding` times larger than requested so that close
+        by requests (e.g. overlapping images) are served from the cache.
+        
+    Returns
+    -------
+    CatalogueCache (or None)
+    """
+    global CATALOGUE_CACHE
+    if CATALOGUE_CACHE is not None:
+        CATALOGUE_CACHE.close()
+    if directory is None:
+        CATALOGUE_CACHE = None
+    else:
+        from .cataloguecache import CatalogueCache
+        CATALOGUE_CACHE = CatalogueCache(directory, maxbytes=maxbytes, padding=padding)
+    return CATALOGUE_CACHE
+
+def fetch_catalogue(source, radec, radius, extracolumns=[], column_filters={"rmag":"5..25"},
+                    usecache=True, **kwargs):
     """ Download a catalogue from internet (Vizier)
     (Module based on astroquery.)
 
@@ -49,6 +135,9 @@ def fetch_catalogue(source, radec, radius, extracolumns=[], column_filters={"rma
         Column name depend on the catalogues.
         Example: If you only want stars for the sdss catalogue add  'cl':6
 
+    usecache: [bool] -optional-
+        Use the local catalogue cache if one is set (see set_catalogue_cache).
+        
     **kwargs goes to vizier.Vizier
 
     Returns
@@ -57,7 +146,12 @@ def fetch_catalogue(source, radec, radius, extracolumns=[], column_filters={"rma
     """
     if type(radec) is not str:
         if len(radec) != 2: raise TypeError("radec must be a string ('ra dec') or a 2D array ([ra,dec])")
-        radec = "%f %f"(radec[0],radec[1])
+        radec = "%f %f"%(radec[0],radec[1])
+
+    if usecache and CATALOGUE_CACHE is not None:
+        return CATALOGUE_CACHE.fetch(fetch_catalogue, source, radec, radius,
+                                     extracolumns=extracolumns, column_filters=column_filters,
+                                     usecache=False, **kwargs)
 
     # Test if catalog exist
     if not hasattr(catalogues, "fetch_%s_catalogue"%source.lower()):
@@ -118,7 +212,7 @@ def create_catalogue(datacatalogue, source=None, **kwargs):
     cat.create(datacatalogue, None)
     return cat
 
-def get_instrument(filename, astrotarget=None,**kwargs):
+def get_instrument(filename, astrotarget=None, instrument=None, **kwargs):
     """ Reads the given file and open its corresponding Instrument object.
     Known instruments are (might not be exhaustive): SDSS / HST / PTF  / GALEX / SNIFS
 
@@ -131,17 +225,21 @@ def get_instrument(filename, astrotarget=None,**kwargs):
         Target associated to the image. The target should be within the
         image's boundaries.
 
+    instrument: [string/None] -optional-
+        Name of the instrument if already known (see INSTRUMENT_REGISTRY).
+        If None, this is found from the file (see which_instrument)
+
     Return
     ------
     Instrument (the corresponding Child's object)
     """
-    for instrument in KNOWN_INSTRUMENTS:
-        if not eval("%s.is_%s_file(filename)"%(instrument,instrument)):
-            continue
-        return eval("%s.%s(filename,astrotarget=astrotarget,**kwargs)"%(instrument,instrument))
-
-    raise ValueError("'filename' does not belong to a known instrument "+"\n"+\
-                     "these are:"+", ".join(KNOWN_INSTRUMENTS))
+    if instrument is None:
+        instrument = which_instrument(filename)
+    if instrument is None:
+        raise ValueError("'filename' does not belong to a known instrument "+"\n"+\
+                         "these are:"+", ".join(KNOWN_INSTRUMENTS))
+    return getattr(INSTRUMENT_REGISTRY[instrument], instrument)(filename,astrotarget=astrotarget,
+                                                                 **kwargs)
 
 def which_band_is_file(filename):
     """ Read to filename and return the name of the photometric
@@ -157,13 +255,7 @@ def which_band_is_file(filename):
     ------
     String (name of the photometric band)
     """
-    for instrument in KNOWN_INSTRUMENTS:
-        if not eval("%s.is_%s_file(filename)"%(instrument,instrument)):
-            continue
-        return eval("%s.which_band_is_file(filename)"%instrument)
-
-    raise ValueError("'filename' does not belong to a known instrument "+"\n"+\
-                     "these are:"+", ".join(KNOWN_INSTRUMENTS))
+    return _get_instrument_module_(filename).which_band_is_file(filename)
 
 def which_obs_mjd(filename):
     """ Read to filename and return the observation time of the given data file.
@@ -177,32 +269,23 @@ def which_obs_mjd(filename):
     ------
     float (MJD)
     """
-    for instrument in KNOWN_INSTRUMENTS:
-        if not eval("%s.is_%s_file(filename)"%(instrument,instrument)):
-            continue
-        return eval("%s.which_obs_mjd(filename)"%instrument)
+    return _get_instrument_module_(filename).which_obs_mjd(filename)
 
-    # - Nothing else...
-    raise ValueError("'filename' does not belong to a known instrument "+"\n"+\
-                     "these are:"+", ".join(KNOWN_INSTRUMENTS))
-                     
 
 def is_known_instrument_file(filename):
     """
     This function test if the given filename is a known object that
     could be loaded by the function *instrument*.
-    This try to return an empty instrument to do so, this will loop
-    through the known *is_`inst`_file*
+    This loops through the known *is_`inst`_file* (see which_instrument)
 
     Return
     ------
     bool
     """
     try:
-        inst = get_instrument(filename,empty=True)
+        return which_instrument(filename) is not None
     except:
         return False
-    return True
 
 def get_instrument_wcs(filename):
     """
@@ -210,17 +293,7 @@ def get_instrument_wcs(filename):
     full image. This might be useful to avoid opening large images
     """
     from .. import astrometry
-    
-    index="notset"
-    for instrument in KNOWN_INSTRUMENTS:
-        if not eval("%s.is_%s_file(filename)"%(instrument,instrument)):
-            continue
-        index = eval("%s.DATAINDEX"%instrument)
-        break
-    
-    if index == "notset":
-        raise ValueError("'filename' does not belong to a known instrument "+"\n"+\
-                        "these are:"+", ".join(KNOWN_INSTRUMENTS))
-    
+    index = _get_instrument_module_(filename).DATAINDEX
     # -- good to go
-    return astrometry.wcs(filename,extension=index)
+    return astrometry.wcs(filename, header=get_header(filename, ext=index),
+                          extension=index)
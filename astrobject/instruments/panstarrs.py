@@ -11,7 +11,7 @@ from astropy.io      import fits as pf
 from astropy         import time
 
 # - local dependencies
-from .baseinstrument    import Instrument
+from .baseinstrument    import Instrument, get_header
 from ..photometry       import get_photopoint
 from ..utils.decorators import _autogen_docstring_inheritance
 from ..utils.tools      import kwargs_update
@@ -55,7 +55,7 @@ def panstarrs(warps_image, weight_image=None, exptime_image=None, **kwargs):
 def is_panstarrs_file(filename):
     """This test if the input file is a GALEX one. Test if 'MPSTYPE' is in the header """
     # not great but this is the structure of MJC images
-    return "PSCAMERA" in pf.getheader(filename).keys()
+    return "PSCAMERA" in get_header(filename).keys()
 
 def which_band_is_file(filename):
     """This resuts the band of the given file if it is a
@@ -63,15 +63,15 @@ def which_band_is_file(filename):
     if not is_panstarrs_file(filename):
         return None
         
-    h_ = pf.getheader(filename)
-    return h_.header.get("HIERARCH FPA.FILTER",None).split(".")[0]
+    h_ = get_header(filename)
+    return h_.get("HIERARCH FPA.FILTER","unknown").split(".")[0]
     
 def which_obs_mjd(filename):
     """ read the galex-filename and return the
     modified julian date """
     if not is_panstarrs_file(filename):
         return None
-    h_ = pf.getheader(filename)
+    h_ = get_header(filename)
     return h_.get("MJD-OBS")
 
 
@@ -3,7 +3,7 @@
 import numpy as np
 from astropy.io import fits as pf
 from astropy import units
-from .baseinstrument import Instrument
+from .baseinstrument import Instrument, get_header
 from ..utils.decorators import _autogen_docstring_inheritance
 from ..utils.tools import kwargs_update
 
@@ -28,7 +28,7 @@ def ptf(*args,**kwargs):
 def is_ptf_file(filename):
     """This test if the input file is a ptf one"""
     # TO  BE CHANGED
-    return True if pf.getheader(filename).get("ORIGIN") == "Palomar Transient Factory" \
+    return True if get_header(filename).get("ORIGIN") == "Palomar Transient Factory" \
       else False
 
 def which_band_is_file(filename):
@@ -36,7 +36,7 @@ def which_band_is_file(filename):
     ptf one"""
     if not is_ptf_file(filename):
         return None
-    return pf.getheader(filename).get("FILTER")
+    return get_header(filename).get("FILTER")
 
 
 
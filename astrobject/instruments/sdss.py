@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 import numpy as np
 from astropy.io import fits as pf
-from .baseinstrument import Instrument
+from .baseinstrument import Instrument, get_header
 from ..utils.decorators import _autogen_docstring_inheritance
 
 __all__ = ["sdss","SDSS_INFO"]
@@ -30,21 +30,21 @@ def sdss(*args,**kwargs):
 
 def is_sdss_file(filename):
     """This test if the input file is a SDSS one"""
-    return pf.getheader(filename).get("ORIGIN") == "SDSS"
+    return get_header(filename).get("ORIGIN") == "SDSS"
 
 def which_band_is_file(filename):
     """This resuts the band of the given file if it is a
     sdss one"""
     if not is_sdss_file(filename):
         return None
-    return pf.getheader(filename).get("FILTER")
+    return get_header(filename).get("FILTER")
 
 def which_obs_mjd(filename):
     """ read the sdss-filename and return the
     modified julian date """
     if not is_sdss_file(filename):
         return None
-    return get_mjd(pf.getheader(filename))
+    return get_mjd(get_header(filename))
 
 # -------------------- #
 # - Inside tools     - #
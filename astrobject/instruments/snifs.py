@@ -3,7 +3,7 @@
 import numpy as np
 from astropy.io import fits as pf
 from astropy import time
-from .baseinstrument import Instrument
+from .baseinstrument import Instrument, get_header
 from ..utils.decorators import _autogen_docstring_inheritance
 
 __all__ = ["snifs","SNIFS_INFO"]
@@ -30,7 +30,7 @@ def snifs(*args,**kwargs):
 def is_snifs_file(filename):
     """This test if the input file is a SNIFS one"""
     # not great but this is the structure of MJC images
-    return pf.getheader(filename).get("ORIGIN") == "hyades2.lbl.gov"  
+    return get_header(filename).get("ORIGIN") == "hyades2.lbl.gov"  
 
 def which_band_is_file(filename):
     """This resuts the band of the given file if it is a
@@ -44,7 +44,7 @@ def which_obs_mjd(filename):
     modified julian date """
     if not is_snifs_file(filename):
         return None
-    return time.Time(pf.getheader(filename)["DATE"]).mjd
+    return time.Time(get_header(filename)["DATE"]).mjd
 
 
 
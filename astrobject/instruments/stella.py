@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 import numpy as np
 from astropy.io import fits as pf
-from .baseinstrument import Instrument
+from .baseinstrument import Instrument, get_header
 from ..utils.decorators import _autogen_docstring_inheritance
 from ..utils.tools import kwargs_update
 __all__ = ["stella","STELLA_INFO"]
@@ -26,7 +26,7 @@ def stella(*args,**kwargs):
 def is_stella_file(filename):
     """This tests if the input file is a SDSS one"""
     try:
-        header = pf.getheader(filename,ext=1)
+        header = get_header(filename,ext=1)
     except:
         return False
     return True if "STELLA" in header.get("TELESCOP")\
@@ -37,7 +37,7 @@ def which_band_is_file(filename):
     stella one"""
     if not is_stella_file(filename):
         return None
-    return pf.getheader(filename,ext=1).get("FILTER")
+    return get_header(filename,ext=1).get("FILTER")
 
 #######################################
 #                                     #
@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 import numpy as np
 from astropy.io import fits as pf
-from .baseinstrument import Instrument
+from .baseinstrument import Instrument, get_header
 from ..utils.decorators import _autogen_docstring_inheritance
 from ..utils.tools import kwargs_update
 
@@ -30,20 +30,20 @@ def twomass(*args, **kwargs):
 
 def is_twomass_file(filename):
     """This test if the input file is a TWOMASS file"""
-    return pf.getheader(filename).get("ORIGIN") == "2MASS"
+    return get_header(filename).get("ORIGIN") == "2MASS"
 
 def which_band_is_file(filename):
     """This returns the band of the given file if it is TWOMASS"""
     if not is_twomass_file(filename):
         return None
-    return pf.getheader(filename).get("FILTER")
+    return get_header(filename).get("FILTER")
 
 def which_obs_mjd(filename):
     """ read the 2MASS filename and return the
     modified julian date """
     if not is_twomass_file(filename):
         return None
-    return get_mjd(pf.getheader(filename))
+    return get_mjd(get_header(filename))
 
 # -------------------- #
 # - Inside tools     - #
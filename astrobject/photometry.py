@@ -4,6 +4,7 @@
 """This module defines the photometric objects"""
 
 import warnings
+import copy
 import numpy         as np
 from scipy       import stats
 from scipy.stats import sigmaclip
@@ -19,9 +20,10 @@ from .            import astrometry
 from propobject   import BaseObject
 from .baseobject  import TargetHandler, WCSHandler, Samplers, CatalogueHandler
 from .utils.shape import HAS_SHAPELY
-from .utils.tools import kwargs_update, flux_to_mag
+from .utils.tools import kwargs_update, flux_to_mag, LRUCache, array_hash
 
-__all__ = ["get_image","get_photopoint"]
+__all__ = ["get_image","get_photopoint","get_photopointarray",
+           "get_image_from_handles","release_image_handles"]
 
 
 def get_image(filename=None, astrotarget=None,
@@ -129,6 +131,50 @@ def get_photopoint(flux=None,var=None,
                                 **kwargs)
     raise ValueError("flux (and var) or datacounts (and bkgdcounts and exptime) must be defined.")
 
+def get_photopointarray(flux, var=None, flags=None,
+                        lbda=None, zp=None, bandname=None, mjd=None,
+                        coords=None, wcs_coords=False,
+                        source=None, instrument_name=None, **kwargs):
+    """ object containing many photometric points stored as columns
+    (one numpy array per parameter) instead of one PhotoPoint per entry.
+
+    Parameters
+    ----------
+    flux, var: [array, array/None]
+        The fluxes (*not magnitudes*) and variances of the photometric points.
+
+    flags: [array] -optional-
+        Flags associated to each point (e.g. sep aperture flags).
+
+    lbda, zp, bandname, mjd: [float/string or array] -optional-
+        Information associated to the points. This could either be a unique
+        value shared by all the points or an array with one value per point.
+
+    coords: [2D-array] -optional-
+        List of coordinates [[x0,y0],[x1,y1] etc.] associated to the points.
+
+    wcs_coords: [bool] -optional-
+        True if the coords are Ra,Dec, False if they are pixel coordinates.
+
+    source: [string] -optional-
+        Staten the origin of the points (e.g. image, ...)
+
+    instrument_name:[string] -optional-
+        Give a name of the intrument that enable to take the photometric points.
+
+    kwargs goes to PhotoPointArray __init__,
+           extra entries will be save as meta columns
+
+    Returns
+    -------
+    PhotoPointArray
+    """
+    return PhotoPointArray(flux=flux, var=var, flags=flags,
+                           lbda=lbda, zp=zp, bandname=bandname, mjd=mjd,
+                           coords=coords, wcs_coords=wcs_coords,
+                           source=source, instrument_name=instrument_name,
+                           **kwargs)
+
 # ========================== #
 #  Internal Tool             #
 # ========================== #
@@ -186,6 +232,344 @@ def dictsource_2_photopoints(dictsource,**kwargs):
             for flux,var,lbda,source,ins in zip(fluxes,variances,lbda,
                                                 source,instrument_name)]
 
+# ========================== #
+#  Tiled SEP                 #
+# ========================== #
+SEP_XKEYS = ["x","xmin","xmax","xpeak","xcpeak"]
+SEP_YKEYS = ["y","ymin","ymax","ypeak","ycpeak"]
+
+def get_image_tiles(shape, ntiles, overlap=0):
+    """ Split an image of the given shape into a grid of tiles.
+
+    Parameters
+    ----------
+    shape: [2-array]
+        (height, width) of the image.
+
+    ntiles: [int or 2-array]
+        Number of tiles along each axis. If int, the same number is used
+        for both axis, otherwise this is (ntiles_y, ntiles_x).
+
+    overlap: [int] -optional-
+        Number of pixels by which each tile is extended over its neighbors.
+
+    Returns
+    -------
+    list of [core, extended] tiles, each being [y0, y1, x0, x1] pixel boundaries.
+    The cores pave the image without overlap.
+    """
+    ntiles_y, ntiles_x = [ntiles,ntiles] if not hasattr(ntiles,"__iter__") else ntiles
+    height, width = shape
+    ybounds = np.linspace(0, height, ntiles_y+1).astype("int")
+    xbounds = np.linspace(0, width,  ntiles_x+1).astype("int")
+    
+    tiles = []
+    for y0,y1 in zip(ybounds[:-1],ybounds[1:]):
+        for x0,x1 in zip(xbounds[:-1],xbounds[1:]):
+            tiles.append([[y0,y1,x0,x1],
+                          [max(y0-overlap,0),min(y1+overlap,height),
+                           max(x0-overlap,0),min(x1+overlap,width)]])
+    return tiles
+
+def _sep_native_array_(data, dtype=None):
+    """ C-contiguous and native byte order version of the array, as sep requires.
+    (no copy if it already is one; dtype=None keeps the data's type) """
+    dtype = np.dtype(data.dtype if dtype is None else dtype).newbyteorder("=")
+    return np.ascontiguousarray(data, dtype=dtype)
+
+def _sep_background_tile_(args):
+    """ measure the sep background of a tile (run in a pool process) """
+    from sep import Background
+    data, prop, dtype = args
+    if prop.get("mask",None) is not None:
+        prop = kwargs_update(prop, mask=np.ascontiguousarray(prop["mask"]))
+    bkgd = Background(_sep_native_array_(data, dtype), **prop)
+    return bkgd.back(), bkgd.rms(), bkgd.globalback, bkgd.globalrms
+
+def _sep_extract_tile_(args):
+    """ run sep.extract on a tile (run in a pool process).
+    The returned sources are in full frame pixel coordinates and
+    only those centered within the tile's core are kept. """
+    from sep import extract
+    data, thresh, core, extended, kwargs = args
+    # - sep needs C-contiguous buffers, not views of the full frame arrays
+    kwargs = {k:np.ascontiguousarray(v) if np.ndim(v)==2 else v for k,v in kwargs.items()}
+    o = _shift_sep_output_(extract(np.ascontiguousarray(data), thresh, **kwargs),
+                           extended[2], extended[0])
+    return o[_sep_output_in_region_(o, *core)]
+
+def _shift_sep_output_(sepoutput, xoffset, yoffset):
+    """ add the offsets to the pixel coordinates of the sep.extract output (in place) """
+    for k in sepoutput.dtype.names:
+        if k in SEP_XKEYS:
+            sepoutput[k] += xoffset
+        elif k in SEP_YKEYS:
+            sepoutput[k] += yoffset
+    return sepoutput
+
+def _sep_output_in_region_(sepoutput, y0, y1, x0, x1):
+    """ boolean array. True for the sep.extract sources centered within the pixel boundaries """
+    return (sepoutput["x"]>=x0-0.5) & (sepoutput["x"]<x1-0.5) & \
+      (sepoutput["y"]>=y0-0.5) & (sepoutput["y"]<y1-0.5)
+
+def _map_in_pool_(func, args, nprocess=None, threads=False, maxinflight=None,
+                  initializer=None, initargs=()):
+    """ map the function on the list of arguments using a pool of nprocess processes
+    (or threads if threads is True). (nprocess=1 means no pool)
+    initializer(*initargs) is called once per worker before the tasks.
+
+    With maxinflight, args can be a generator: at most maxinflight arguments
+    are taken from it and submitted but not collected at the same time
+    (so that only these are in memory). The results are in the order of args.
+    """
+    if nprocess == 1 or (maxinflight is None and len(args) == 1):
+        if initializer is not None:
+            initializer(*initargs)
+        return map(func, args)
+    if threads:
+        from multiprocessing.pool import ThreadPool as Pool
+    else:
+        from multiprocessing import Pool
+    pool = Pool(nprocess, initializer=initializer, initargs=initargs)
+    try:
+        if maxinflight is None:
+            return pool.map(func, args)
+        results, inflight = [], []
+        for arg in args:
+            if len(inflight) >= maxinflight:
+                results.append(inflight.pop(0).get())
+            inflight.append(pool.apply_async(func, (arg,)))
+        return results + [r_.get() for r_ in inflight]
+    finally:
+        pool.close()
+        pool.join()
+
+# ========================== #
+#  Array transport           #
+# ========================== #
+# Image arrays written in scratch files by Image.publish_arrays
+# [name, which properties dict]
+IMAGE_SHARED_ARRAYS = [["rawdata","_properties"],["var","_properties"],
+                       ["background","_properties"],["datamask","_side_properties"],
+                       ["data","_derived_properties"]]
+
+def get_image_from_handles(handles, mode="r"):
+    """ Image rebuilt from the handles returned by Image.publish_arrays().
+    Its arrays are memory maps of the scratch files: no pixel is copied, whatever
+    the number of processes rebuilding the same image.
+    
+    Parameters
+    ----------
+    handles: [dict]
+        output of Image.publish_arrays()
+
+    mode: [string] -optional-
+        memory map mode of the arrays ('r' read only, 'c' copy-on-write)
+        
+    Returns
+    -------
+    Image (the base class: only the data, wcs solution, sep output and gain are restored)
+    """
+    image = Image(empty=True)
+    image._build_properties.update(handles["build"])
+    image._properties["filename"]    = handles["filename"]
+    image._properties["header"]      = pf.Header.fromstring(handles["header"])
+    image._side_properties["exptime"] = handles["exptime"]
+    for name, props in IMAGE_SHARED_ARRAYS:
+        if name in handles["arrays"]:
+            getattr(image, props)[name] = np.load(handles["arrays"][name], mmap_mode=mode)
+        elif name in handles.get("scalars",{}):
+            getattr(image, props)[name] = handles["scalars"][name]
+    image._derived_properties["sepoutput"] = handles["sepoutput"]
+    if handles["wcs"] is not None:
+        image.set_wcs(handles["wcs"], force_it=True)
+    if handles["gain"] is not None:
+        # (see get_aperture)
+        image._dataunits_to_electron = handles["gain"]
+    return image
+
+def release_image_handles(handles):
+    """ remove the scratch files of the given Image.publish_arrays() handles """
+    import os
+    for filename in handles["arrays"].values():
+        if os.path.isfile(filename):
+            os.remove(filename)
+    if handles["tmpdir"] and os.path.isdir(handles["directory"]) and \
+      len(os.listdir(handles["directory"])) == 0:
+        os.rmdir(handles["directory"])
+    
+# ========================== #
+#  Mask Plane                #
+# ========================== #
+# Bits of the Image's uint16 mask plane (see Image.get_bitmask). The other bits
+# are attributed on demand to the user masks and to the sep masks (one per scale).
+MASKBITS = {"datamask":0, "background":1}
+MASKPLANE_NBITS = 16
+
+def get_sepmask_name(scaleup):
+    """ name of the mask plane bit of the sep objects' ellipses scaled up by `scaleup` """
+    return "sep_r%s"%scaleup
+
+# ========================== #
+#  Aperture Photometry       #
+# ========================== #
+def _sum_aperture_(data, x, y, aptype, r_pixels, ellipse_args, annular_args, **kwargs):
+    """ call the sep.sum_*aptype* function (see Image.get_aperture).
+    **kwargs goes to sep.sum_*aptype* """
+    import sep
+    if aptype == "circle":
+        return sep.sum_circle(data, x, y, r_pixels, **kwargs)
+    
+    if aptype == "circann":
+        return sep.sum_circann(data, x, y, annular_args["rin"], annular_args["rout"],
+                               **kwargs)
+    
+    a,b,theta = [ellipse_args[k] for k in ["a","b","theta"]]
+    if aptype == "ellipse":
+        return sep.sum_ellipse(data, x, y, a, b, theta, r_pixels, **kwargs)
+    
+    if aptype == "ellipan":
+        return sep.sum_ellipan(data, x, y, a, b, theta,
+                               annular_args["rin"], annular_args["rout"], **kwargs)
+    
+    raise ValueError("the given aptype (%s) is not a known/implemeted sep aperture"%aptype)
+
+# data, aptype and sep options shared by the workers of _sum_aperture_chunks_
+_APERTURE_WORKER_ = {}
+
+def _set_aperture_worker_(data, aptype, kwargs):
+    """ record the arguments common to all the chunks (pool initializer) """
+    _APERTURE_WORKER_.update(data=data, aptype=aptype, kwargs=kwargs)
+
+def _sum_aperture_chunk_(args):
+    """ _sum_aperture_ on a chunk of positions (run in a pool process) """
+    x, y, r_pixels, ellipse_args, annular_args, kwargs = args
+    return _sum_aperture_(_APERTURE_WORKER_["data"], x, y, _APERTURE_WORKER_["aptype"],
+                          r_pixels, ellipse_args, annular_args,
+                          **kwargs_update(_APERTURE_WORKER_["kwargs"], **kwargs))
+
+def _sum_aperture_chunks_(n_workers, data, x, y, aptype, r_pixels,
+                          ellipse_args, annular_args, **kwargs):
+    """ _sum_aperture_ on n_workers chunks of positions evaluated by a pool of
+    processes. The data and the full frame options (var, mask...) are given once
+    to each worker (not copied with fork), the chunks only carry the positions
+    and the per-position parameters.
+    The chunks' outputs are concatenated back in the input order. """
+    x, y = np.asarray(x, dtype="float"), np.asarray(y, dtype="float")
+    npos = len(x)
+    def split(value, index):
+        # - only the per-position entries are split
+        return value[index] if value is not None and np.ndim(value) > 0 \
+          and np.shape(value)[0] == npos else value
+    
+    # - the background annulus (rin, rout) can be per-position too
+    bkgann = kwargs.pop("bkgann", None)
+    args = [[x[index], y[index], split(r_pixels, index),
+             {k:split(v, index) for k,v in ellipse_args.items()},
+             {k:split(v, index) for k,v in annular_args.items()},
+             {} if bkgann is None else {"bkgann":tuple([split(np.asarray(v), index)
+                                                        for v in bkgann])}]
+            for index in np.array_split(np.arange(npos), n_workers)]
+    return [np.concatenate(out, axis=0)
+            for out in zip(*_map_in_pool_(_sum_aperture_chunk_, args, nprocess=n_workers,
+                                          initializer=_set_aperture_worker_,
+                                          initargs=(data, aptype, kwargs)))]
+
+# ========================== #
+#  Background Models         #
+# ========================== #
+# Cache of the measured sep backgrounds, shared by the Images that use it
+# (opt-in, see Image.set_background_cache). Entries are keyed by the origin of the
+# pixels (file, extension, mtime and slicing; their hash otherwise), the mask and
+# the box parameters. The cached arrays are read-only.
+BACKGROUND_CACHE = LRUCache(maxsize=50, maxbytes=2**29)
+
+class _SepBackgroundModel_( object ):
+    """ Stored sep background.
+    This mimics the methods of sep.Background used by the Image """
+    def __init__(self, back, rms, globalback, globalrms):
+        """ """
+        self._back = back
+        self._rms  = rms
+        self.globalback = globalback
+        self.globalrms  = globalrms
+
+    @classmethod
+    def from_sep(cls, sepbackground):
+        """ store the result of a sep.Background """
+        return cls(sepbackground.back(), sepbackground.rms(),
+                   sepbackground.globalback, sepbackground.globalrms)
+    
+    @classmethod
+    def from_file(cls, filename, key=None):
+        """ load the background stored in the given npz file.
+        Returns None if the file does not exist or its key is not the given one."""
+        import os
+        if not os.path.isfile(filename):
+            return None
+        try:
+            stored = np.load(filename)
+            if key is not None and str(stored["key"]) != key:
+                return None
+            return cls(stored["back"], stored["rms"],
+                       float(stored["globalback"]), float(stored["globalrms"]))
+        except (IOError, KeyError, ValueError):
+            warnings.warn("Cannot read the background file %s"%filename)
+            return None
+        
+    def writeto(self, filename, key=""):
+        """ store the background in the given npz file """
+        np.savez(filename, back=self._back, rms=self._rms, key=key,
+                 globalback=self.globalback, globalrms=self.globalrms)
+        
+    def back(self):
+        return self._back
+    
+    def rms(self):
+        return self._rms
+
+    def set_readonly(self):
+        """ lock the arrays (e.g. before sharing them through a cache) """
+        for array in [self._back, self._rms]:
+            if isinstance(array, np.ndarray):
+                array.flags.writeable = False
+        return self
+    
+    @property
+    def nbytes(self):
+        return self._back.nbytes + self._rms.nbytes
+    
+class _TiledSepBackground_( _SepBackgroundModel_ ):
+    """ Sep backgrounds measured on tiles, blended over the tiles' overlaps. """
+    def __init__(self, shape, tiles, measurements):
+        """ tiles as returned by get_image_tiles and measurements by _sep_background_tile_ """
+        back   = np.zeros(shape, dtype=measurements[0][0].dtype)
+        rms    = np.zeros(shape, dtype=measurements[0][1].dtype)
+        weight = np.zeros(shape, dtype=measurements[0][0].dtype)
+        for (core, extended),(back_, rms_, _, _) in zip(tiles, measurements):
+            # - weight 1 within the core decreasing linearly over the overlap
+            #   (no seam at the core edges)
+            weight_ = np.outer(self._get_ramp_(core[0], core[1], extended[0], extended[1]),
+                               self._get_ramp_(core[2], core[3], extended[2], extended[3]))
+            slice_extended = (slice(extended[0],extended[1]), slice(extended[2],extended[3]))
+            back[slice_extended]   += weight_*back_
+            rms[slice_extended]    += weight_*rms_
+            weight[slice_extended] += weight_
+        back /= weight
+        rms  /= weight
+            
+        super(_TiledSepBackground_, self).__init__(back, rms,
+                                                   np.median([m[2] for m in measurements]),
+                                                   np.median([m[3] for m in measurements]))
+
+    @staticmethod
+    def _get_ramp_(core0, core1, extended0, extended1):
+        """ 1d weights of the extended tile pixels: 1 within the core, linearly
+        decreasing (but positive) outside """
+        pixels = np.arange(extended0, extended1)
+        outside = np.maximum(np.maximum(core0-pixels, pixels-(core1-1)), 0)
+        return 1. - outside / float(max(core0-extended0, extended1-core1) + 1)
+
 #######################################
 #                                     #
 # Base Object Classes: Image          #
@@ -198,8 +582,9 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
 
     PROPERTIES         = ["filename","rawdata","header","var","background"]
     SIDE_PROPERTIES    = ["datamask","exptime"] 
-    DERIVED_PROPERTIES = ["fits","data","sepobjects","backgroundmask",
-                          "apertures_photos","fwhm"]
+    DERIVED_PROPERTIES = ["fits","data","sepobjects","sepoutput","backgroundmask",
+                          "apertures_photos","fwhm","emptysky",
+                          "maskplane","maskbits","maskbitorder"]
 
     # -------------------- #
     # Internal Properties  #
@@ -254,6 +639,10 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
                 dataslice0="undefined",
                 dataslice1="undefined",
                 bkgdbox={"bh":100,"bw":100,"fh":3,"fw":3},
+                lazydata=False,
+                dtype=None,
+                septiling=None,
+                bkgdcache={"memory":False, "sidecar":False},
                 )
 
     # =========================== #
@@ -264,7 +653,8 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
     # ------------------- #
     def load(self,filename,index=None,mask=None,
              force_it=False, background=None,
-             dataslice0=None,dataslice1=None):
+             dataslice0=None,dataslice1=None,
+             lazy=False, dtype=None):
         """
         This enables to load a fitsfile image and will create
         the basic data and wcs solution if possible.
@@ -296,6 +686,16 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
             If the data already exist, this method will raise an
             exception except if you set *force_it* to True.
             Be Careful with this.
+
+        lazy: [bool] -optional-
+            If True, 'rawdata' is kept as the (memory mapped) fits data
+            without any copy and 'data' (rawdata - background) is not stored:
+            it is computed on flight, and only for the requested pixels when
+            possible (see get_data_region, get_aperture, show).
+            
+        dtype: [string/numpy.dtype] -optional-
+            Type of the pixel values computed in lazy mode (e.g. 'float32' to
+            half the memory footprint). None means float (64bits).
             
         Return
         ------
@@ -308,6 +708,8 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
 
         index = self._build_properties["data_index"] if index is None \
           else index
+        self._build_properties["lazydata"] = lazy
+        self._build_properties["dtype"]    = dtype
           
         # -------------------------- #
         #  fits file and wcs         #
@@ -405,6 +807,8 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
         reload_sep = self.has_sepobjects()
 
         self._derived_properties["sepobjects"] = None
+        self._derived_properties["sepoutput"]  = None
+        self._derived_properties["emptysky"]   = None
         self._build_properties["dataslice0"] = dataslice0
         self._build_properties["dataslice1"] = dataslice1
 
@@ -418,6 +822,130 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
                 self.catalogue.set_fovmask(wcs=self.wcs)
         
         if reload_sep: self.sep_extract()
+
+    def publish_arrays(self, directory=None):
+        """ Write the large arrays of the instance (rawdata, var, background, datamask and data)
+        in scratch .npy files and returns light (picklable) handles from which
+        get_image_from_handles() rebuilds, in any process, an Image whose arrays
+        are memory maps of these files.
+        Use this to send one image to many worker processes: only the handles are pickled.
+
+        Parameters
+        ----------
+        directory: [string/None] -optional-
+            where the scratch files are written. If None a temporary directory
+            is created (preferably on a memory backed file system, see tempfile).
+
+        Returns
+        -------
+        dict (handles, see release_image_handles() to remove the files)
+        """
+        import os, tempfile
+        tmpdir = directory is None
+        if tmpdir:
+            directory = tempfile.mkdtemp(prefix="astrobject_")
+        prefix = os.path.join(directory, "%s_"%id(self))
+        
+        arrays, scalars = {}, {}
+        for name, props in IMAGE_SHARED_ARRAYS:
+            # (the default variance is derived from the sep background)
+            value = self.var if name == "var" else getattr(self, props)[name]
+            if value is None:
+                continue
+            if np.ndim(value) < 2:
+                # - e.g. a constant background: sent as it is
+                scalars[name] = value
+                continue
+            filename = prefix+"%s.npy"%name
+            scratch = np.lib.format.open_memmap(filename, mode="w+",
+                                                dtype=value.dtype.newbyteorder("="),
+                                                shape=np.shape(value))
+            scratch[:] = value
+            scratch.flush()
+            del scratch
+            arrays[name] = filename
+
+        build = {k:v for k,v in self._build_properties.items()
+                 if k in ["data_index","dataslice0","dataslice1","lazydata","dtype","bkgdbox"]}
+        return {"arrays":arrays, "scalars":scalars, "directory":directory, "tmpdir":tmpdir,
+                "build":copy.deepcopy(build),
+                "filename":self.filename,
+                "header":self.header.tostring() if self.header is not None else "",
+                "exptime":self._side_properties["exptime"],
+                "wcs":self.wcs if self.has_wcs() else None,
+                "sepoutput":self._derived_properties["sepoutput"],
+                "gain":getattr(self, "_dataunits_to_electron", None)}
+        
+    def get_cutout(self, ra, dec, radius, runits="arcsec", wcs_coords=True):
+        """ Lightweight sub-Image (same class) of the pixels within +/- radius
+        around the given coordinates. Nothing is re-read nor re-measured:
+        the cutout's rawdata, data, background, variance and mask are views
+        of the current instance's arrays (memory map included), its wcs solution is
+        a copy with the corresponding offset and its sepobjects are the current
+        sepobjects within the cutout (built when first accessed).
+        
+        Parameters
+        ----------
+        ra, dec: [float, float]
+            Center of the cutout (degree if wcs_coords, pixels otherwise)
+
+        radius: [float]
+            Half size of the cutout in unit of `runits`.
+
+        runits: [string/astropy.units] -optional-
+            Unit of the radius. Any unit accepted by units_to_pixels.
+
+        wcs_coords: [bool] -optional-
+            Are ra, dec given in world coordinates (True) or in pixels (False)
+
+        Returns
+        -------
+        Image (same class as the current instance)
+        """
+        # -- Boundaries
+        x, y = self.coords_to_pixel(ra, dec) if wcs_coords else [ra, dec]
+        r_pixels = radius*self.units_to_pixels(runits).value
+        y0, y1 = [int(np.clip(np.floor(y-r_pixels), 0, self.height)),
+                  int(np.clip(np.ceil(y+r_pixels)+1, 0, self.height))]
+        x0, x1 = [int(np.clip(np.floor(x-r_pixels), 0, self.width)),
+                  int(np.clip(np.ceil(x+r_pixels)+1, 0, self.width))]
+        if y0 == y1 or x0 == x1:
+            raise ValueError("The requested cutout is outside the image boundaries")
+        
+        slice_ = (slice(y0,y1), slice(x0,x1))
+        def view(array):
+            return array[slice_] if array is not None and np.ndim(array) == 2 else array
+        
+        # -- Cutout
+        offset0, offset1 = self._dataoffset
+        cutout = self.__class__(empty=True)
+        cutout._build_properties = kwargs_update(self._build_properties,
+                                    **{"dataslice0":[offset0+y0, offset0+y1],
+                                       "dataslice1":[offset1+x0, offset1+x1],
+                                       "septiling":None})
+        cutout._properties["filename"]      = self.filename
+        cutout._properties["header"]        = self.header
+        cutout._properties["rawdata"]       = view(self.rawdata)
+        cutout._properties["var"]           = view(self.var)
+        cutout._properties["background"]    = view(self.background)
+        cutout._side_properties["datamask"] = view(self.datamask)
+        cutout._side_properties["exptime"]  = self._side_properties["exptime"]
+        cutout._derived_properties["fits"]  = self.fits
+        cutout._derived_properties["data"]  = view(self._derived_properties["data"])
+        cutout._derived_properties["fwhm"]  = self._derived_properties["fwhm"]
+        cutout._uses_default_background     = False
+        
+        if self.has_wcs():
+            cutout.set_wcs(copy.copy(self.wcs), force_it=True)
+        if self.has_target():
+            cutout._side_properties["target"] = self.target
+        # - sepobjects built from it only if requested (see sepobjects)
+        if self._derived_properties["sepoutput"] is not None:
+            sepoutput = self._derived_properties["sepoutput"]
+            cutout._derived_properties["sepoutput"] = \
+              _shift_sep_output_(sepoutput[_sep_output_in_region_(sepoutput, y0, y1, x0, x1)],
+                                 -x0, -y0)
+        return cutout
         
     # ------------------- #
     # - Set Methods     - #
@@ -492,6 +1020,9 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
             raise TypeError("the shape of the given mask does not match the data shape")
         
         self._side_properties["datamask"] = mask
+        self._derived_properties["emptysky"] = None
+        if self._derived_properties["maskplane"] is not None:
+            self.set_bitmask("datamask", mask)
         
         
     def set_background(self,background,
@@ -558,14 +1089,18 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
             
         # Shape test
         if not hasattr(background,"__iter__"):
-            background = np.ones(np.shape(self.rawdata))*np.float(background)
+            # - in lazy mode, a constant background does not need an image
+            background = np.float(background) if self.is_lazy() else \
+              np.ones(np.shape(self.rawdata))*np.float(background)
             
-        if self.rawdata is not None and np.shape(background) != self.shape:
+        if self.rawdata is not None and np.ndim(background)>0 and \
+          np.shape(background) != self.shape:
             raise ValueError("The given background must have rawdata's shape")
         
         # -- Looks good
         
-        self._properties['background'] = np.asarray(background)
+        self._properties['background'] = np.asarray(background) if not self.is_lazy() else\
+          np.asarray(background, dtype=self._lazydtype)
         if update:
             self._update_data_(update_background=False)
         
@@ -608,29 +1143,51 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
         masked array (shape of the data)
         """
         from sep import mask_ellipse
-        ellipsemask_o    = np.asarray(np.zeros((self.height,self.width)),dtype="bool")
-        ellipsemask_i = np.asarray(np.zeros((self.height,self.width)),dtype="bool")
-
-        mask_ellipse( ellipsemask_o, x, y, a, b, theta, r= rout)
-        mask_ellipse( ellipsemask_i, x, y, a, b, theta, r= rin )
-
-        return ~ ((~ellipsemask_o) + ellipsemask_i)
+        x, y = np.atleast_1d(np.asarray(x, dtype="float")), np.atleast_1d(np.asarray(y, dtype="float"))
+        annmask = np.zeros((self.height,self.width), dtype="bool")
+        # - the annulus are only rasterized within their bounding box
+        extent = np.nanmax(np.asarray(a, dtype="float")*rout)
+        x0, x1 = [int(np.clip(v, 0, self.width))  for v in [np.floor(np.nanmin(x)-extent)-1,
+                                                            np.ceil(np.nanmax(x)+extent)+2]]
+        y0, y1 = [int(np.clip(v, 0, self.height)) for v in [np.floor(np.nanmin(y)-extent)-1,
+                                                            np.ceil(np.nanmax(y)+extent)+2]]
+        if x0 >= x1 or y0 >= y1:
+            return annmask
+        
+        # - sep needs C-contiguous buffers: not views of the full frame
+        ellipsemask_o = np.zeros((y1-y0,x1-x0), dtype="bool")
+        ellipsemask_i = np.zeros((y1-y0,x1-x0), dtype="bool")
+        mask_ellipse( ellipsemask_o, x-x0, y-y0, a, b, theta, r= rout)
+        mask_ellipse( ellipsemask_i, x-x0, y-y0, a, b, theta, r= rin )
+        annmask[y0:y1,x0:x1] = ellipsemask_o & ~ellipsemask_i
+        return annmask
     
     # ----------- #
     #  Aperture   #
     # ----------- #
     def get_stars_aperture(self, radius,runits="pixels",aptype="circle",
                            isolated_only=True, catmag_range=[None,None],
-                           **kwargs):
+                           asarray=False, **kwargs):
         """
         This methods fetch in the catalogue and sep_extracted objects (sepobjects)
         the matched points.
         It then perform a large aperture
 
+        radius: [float or array]
+            Radius of the aperture. If a (1 x n_radii) array is given, all the radii
+            are measured at once and get_aperture's outputs are 2D (n_stars x n_radii).
+
+        asarray: [bool] -optional-
+            If True, the aperture output is returned as a PhotoPointArray
+            (columnar photopoints located at the stars' pixel coordinates)
+            instead of the (sum,sumerr,flag) tuple. (Single radius per star only)
+
         Return
         ------
-        sep_idx, catalogue_idx, get_aperture's output (sum,sumerr,flag)
+        sep_idx, catalogue_idx, get_aperture's output (sum,sumerr,flag) [or PhotoPointArray]
         """
+        if asarray and np.ndim(radius) > 1:
+            raise ValueError("asarray=True requires a single radius per star")
         # -------------- #
         # - Input Test - #
         # -------------- #
@@ -658,17 +1215,81 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
         # -------------------- #
         # - Get it           - #
         # -------------------- #
-        return idx, cat_idx, self.get_aperture(x,y,radius=radius,runits=runits,
-                                               aptype=aptype,**kwargs)
-    
+        apertures = self.get_aperture(x,y,radius=radius,runits=runits,
+                                      aptype=aptype,**kwargs)
+        if asarray:
+            return idx, cat_idx, self._aperture_to_photopointarray_(*apertures,
+                                                    coords=np.asarray([x,y]).T,
+                                                    wcs_coords=False)
+        return idx, cat_idx, apertures
+
+    def get_curve_of_growth(self, radii, runits="pixels", reference_radius=None,
+                            isolated_only=True, catmag_range=[None,None],
+                            **kwargs):
+        """ Curve of growth of the isolated stars (see get_stars_aperture) and the
+        associated aperture corrections. All the radii are measured in one pass.
+
+        Parameters
+        ----------
+        radii: [array]
+            Aperture radii (in `runits`).
+
+        runits: [str/astropy.units] -optional-
+            The unit of the radii.
+
+        reference_radius: [float/None] -optional-
+            Radius (in `runits`) assumed to contain the total flux of the stars.
+            If None, the largest radius is used.
+
+        isolated_only, catmag_range:
+            Stars selection. See get_stars_aperture.
+
+        **kwargs goes to get_aperture (through get_stars_aperture)
+
+        Returns
+        -------
+        dict(radius, growth, growth_err, apcorr, nstars)
+        where growth is the median fraction of the reference flux within each radius
+        and apcorr=-2.5*log10(growth) the magnitude correction (to be added) from the
+        radius to the reference radius.
+        """
+        radii = np.atleast_1d(np.asarray(radii, dtype="float"))
+        reference_radius = np.max(radii) if reference_radius is None else reference_radius
+        allradii = np.append(radii, reference_radius)
+        
+        idx, cat_idx, (counts, err, flags) = self.get_stars_aperture(allradii[None,:], runits=runits,
+                                                    isolated_only=isolated_only,
+                                                    catmag_range=catmag_range, **kwargs)
+        counts = np.atleast_2d(counts)
+        reference = counts[:,-1]
+        # - only stars with a positive and unflagged reference flux
+        flagged = np.any(np.atleast_2d(flags)>0, axis=1)
+        stars   = ~flagged & (reference>0)
+        if not np.any(stars):
+            raise ValueError("No usable stars to derive the curve of growth")
+            
+        growth = counts[stars][:,:-1] / reference[stars][:,None]
+        nstars = len(growth)
+        growth_med = np.median(growth, axis=0)
+        # 1.4826*MAD / sqrt(n) ; robust error on the median
+        growth_err = 1.4826*np.median(np.abs(growth-growth_med), axis=0)/np.sqrt(nstars)
+        
+        return {"radius":radii, "growth":growth_med, "growth_err":growth_err,
+                "apcorr":-2.5*np.log10(growth_med), "nstars":nstars}
+        
     def get_target_aperture(self,radius,runits="pixels",aptype="circle",subpix=5,
                             **kwargs):
         """If a target is loaded, this will get the target coords and run
         'get_aperture'.
+        If radius is an array, all the radii are measured at once
+        and get_aperture's outputs are 2D (1 x n_radii).
         """
         if self.target is None:
             raise AttributeError("No 'target' loaded")
         xpix,ypix = self.coords_to_pixel(self.target.ra,self.target.dec)
+        # - a single position: any array of radii is a curve of growth
+        if np.ndim(radius) == 1:
+            radius = np.asarray(radius)[None,:]
         return self.get_aperture(xpix,ypix,
                                  radius=radius,runits=runits,
                                  aptype=aptype,
@@ -731,10 +1352,11 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
 
     def get_noise_aperture(self, radius, runits="arcsec", ncall=1000,
                             sourcemask=None,
-                            rangex=None, rangey=None, scaleup=4, **kwargs):
+                            rangex=None, rangey=None, scaleup=4,
+                            avoid_sources=False, seed=None, **kwargs):
         """ Measure the aperture photometry on the "noise" part of the image.
         The "noise" is defined as area remaining after  masking-out of 
-        the SEP detected object with a scaling up of "scaleup".
+        the SEP detected object with a scaling up of "scaleup" (and of the datamask).
 
         Parameters
         ----------
@@ -763,6 +1385,12 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
             Scaling up of the SEP ellipses that should be masked out.
             - Used only if sourcemask is not provided -
 
+        avoid_sources: [bool] -optional-
+            If True, the entire apertures (not only their centers) avoid
+            the masked pixels and the image edges.
+
+        seed: [int/None] -optional-
+            Seed of the random drawing, for reproducible positions.
 
         **kwargs goes to get_aperture()
 
@@ -770,27 +1398,87 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
         -------
         List of [Flux, Error, flag] // (List of get_aperture returns)
         """
-        if sourcemask is None:
-            sourcemask = self.derive_sepmask( r=scaleup )
+        r_pixels = radius*self.units_to_pixels(runits).value
+        pixels = self.get_emptysky_pixels(scaleup=scaleup, sourcemask=sourcemask,
+                                          rangex=rangex, rangey=rangey,
+                                          radius=r_pixels if avoid_sources else None,
+                                          flat=True)
+        if len(pixels) == 0:
+            raise ValueError("No empty sky pixel available")
+        
+        random  = np.random.RandomState(seed)
+        y, x    = np.unravel_index(pixels[random.randint(0, len(pixels), size=ncall)], self.shape)
+        # - continuous positions within the drawn pixels
+        x_,y_   = x+random.uniform(-0.5,0.5,size=ncall), y+random.uniform(-0.5,0.5,size=ncall)
+        return self.get_aperture(x_, y_, r_pixels, "pixels", **kwargs)
+
+    def get_emptysky_pixels(self, scaleup=4, sourcemask=None,
+                            rangex=None, rangey=None, radius=None, flat=False):
+        """ Pixels (y, x) free of sources. The result is cached (as flat indexes)
+        per (scaleup, radius, rangex, rangey) unless a sourcemask is given.
+
+        Parameters
+        ----------
+        scaleup: [float] -optional-
+            Scaling up of the SEP ellipses that are masked out (see derive_sepmask).
+
+        sourcemask: [2D bool array or None] -optional-
+            Use this mask instead of the sep one (no caching then).
+            
+        rangex, rangey: [array or None], [array or None]
+            Range of x and y pixels to be considered.
+
+        radius: [float/None] -optional-
+            If given (pixels), only the pixels at least at this distance of any
+            masked pixels and of the image edges are returned.
+
+        flat: [bool] -optional-
+            return the flat indexes of the pixels (see np.unravel_index) instead
+            of their y, x coordinates.
+
+        Returns
+        -------
+        y, x (int arrays) [or int array if flat]
+        """
         # - Range parsing 
-        if rangex is None: rangex=[0, self.shape[1]]
-        if rangey is None: rangey=[0, self.shape[0]]
-        if rangex[0] is None: rangex[0] = 0
-        if rangey[0] is None: rangey[0] = 0
-        if rangex[1] is None: rangex[1] = self.shape[1]
-        if rangey[1] is None: rangey[1] = self.shape[0]
-
-        overtry= 5
-        x = np.random.uniform(rangex[0],rangex[1],size=(ncall*overtry))
-        y = np.random.uniform(rangey[0],rangey[1],size=(ncall*overtry))
-        i_in = np.random.choice([i for i in range(ncall*overtry) if not sourcemask[y[i],x[i]]],
-                         size=ncall)
-        return im.get_aperture(x[i_in], y[i_in], radius, runits, **kwargs)
+        rangex = [0, self.width] if rangex is None else \
+          [0 if rangex[0] is None else rangex[0], self.width if rangex[1] is None else rangex[1]]
+        rangey = [0, self.height] if rangey is None else \
+          [0 if rangey[0] is None else rangey[0], self.height if rangey[1] is None else rangey[1]]
+        
+        key = (scaleup, radius, tuple(rangex), tuple(rangey))
+        if sourcemask is None and key in self._emptysky:
+            pixels = self._emptysky[key]
+            return pixels if flat else np.unravel_index(pixels, self.shape)
+        
+        freemask = ~np.asarray(self.derive_sepmask(r=scaleup) if sourcemask is None
+                               else sourcemask, dtype="bool")
+        if self.has_datamask():
+            freemask &= ~np.asarray(self.datamask, dtype="bool")
+            
+        if radius is not None:
+            from scipy.ndimage import distance_transform_edt
+            # - distance to the closest masked pixel or to the edges
+            freemask[[0,-1],:], freemask[:,[0,-1]] = False, False
+            freemask = distance_transform_edt(freemask) > radius
+            
+        ymin,ymax = [int(np.clip(np.ceil(r_), 0, self.height)) for r_ in rangey]
+        xmin,xmax = [int(np.clip(np.ceil(r_), 0, self.width))  for r_ in rangex]
+        freemask[:ymin], freemask[ymax:], freemask[:,:xmin], freemask[:,xmax:] = False, False, False, False
+        # - flat indexes (4 bytes per pixel when possible) rather than y and x
+        pixels = np.flatnonzero(freemask)
+        if freemask.size < 2**31:
+            pixels = pixels.astype("int32")
+        if sourcemask is None:
+            self._emptysky[key] = pixels
+        return pixels if flat else np.unravel_index(pixels, self.shape)
     
     def get_idx_aperture(self, idx, scaleup=2.5, **kwargs):
         """ give the index [list of] of an sep's object(s)
         and extract the aperture at this location.
-        
+        If scaleup is a (1 x n_scaleup) array, all the scaling are measured at once
+        and get_aperture's outputs are 2D (n_idx x n_scaleup).
+        (a 1D scaleup array gives one scaling per idx)
         """
         if not self.has_sepobjects():
             raise AttributeError("sepobjects has not been set. Run sep_extract()")
@@ -808,7 +1496,7 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
                      aptype="circle",subpix=5,
                      ellipse_args={"a":None,"b":None,"theta":None},
                      annular_args={"rin":None,"rout":None},
-                     on="data", syserr = 0,
+                     on="data", syserr = 0, n_workers=None,
                      **kwargs):
         """
         This method uses K. Barary's Sextractor python module SEP
@@ -847,9 +1535,12 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
             (no other type allowed)
                                                
         
-        radius: [float]            
-            Size of the circle radius.
-            (This is used only if aptype is circle)
+        radius: [float or array]
+            Size of the circle radius (or scaling of the ellipse).
+            (This is used only if aptype is circle or ellipse)
+            A 1D array gives one radius per position.
+            A (1 x n_radii) array measures all the radii at every position in one
+            pass (curve of growth) and the returned arrays are 2D (n_positions x n_radii).
                                    
         runits: [str/astropy.units] 
             The unit of the radius (used to convert radius in pixels)
@@ -868,6 +1559,14 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
         annular_args: [dict]       
             The annular parameter that must be filled if
             atype is circan of ellipan.
+            If rin and rout are (1 x n_annulus) arrays, all the annulus are measured
+            in one pass and the returned arrays are 2D (n_positions x n_annulus).
+
+        n_workers: [int/None] -optional-
+            Split the positions in n_workers chunks measured concurrently
+            by a pool of processes (the data, var and mask arrays are given once
+            to each process). The results are identical to the serial ones.
+            This is worth it for large sets of positions only. None or 1 means serial.
 
         
         - other options ; not exhautive ; goes to sep.sum_*aptype* - 
@@ -890,8 +1589,6 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
         ------
         sum, sumerr, flags (0 if no flag given)
         """
-        
-        import sep
         # - This should be moved in a c-lib
         if aptype not in ["circle","circann","ellipse","ellipan"]:
             raise ValueError("the given aptype (%s) is not a "+\
@@ -900,13 +1597,27 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
         # ---------------
         # Input Parsing
         # - radius
-        r_pixels = radius*self.units_to_pixels(runits)
+        r_pixels = None if radius is None else \
+          np.asarray(radius, dtype="float")*self.units_to_pixels(runits).value
         # - position
         if wcs_coords and not self.has_wcs():
             raise AttributeError("you cannot provide ra,dec coordinate without a wcs solution:"+\
                                  " cannot convert them into pixel coords")
         if wcs_coords:
             x,y = self.coords_to_pixel(x,y).T 
+        # - Many radii: (1 x n_radii) arrays give (n_positions x n_radii) outputs.
+        #   (1D arrays keep sep's elementwise meaning: one radius per position)
+        if np.ndim(r_pixels) == 2 or \
+          (aptype in ["circann","ellipan"] and np.ndim(annular_args["rin"]) == 2):
+            x, y = np.atleast_1d(x)[:,None], np.atleast_1d(y)[:,None]
+            if r_pixels is not None:
+                r_pixels = np.atleast_2d(r_pixels)
+            if aptype in ["circann","ellipan"]:
+                annular_args = {k:np.atleast_2d(v) if v is not None else v
+                                for k,v in annular_args.items()}
+            if aptype in ["ellipse","ellipan"]:
+                ellipse_args = {k:np.atleast_1d(v)[:,None] if v is not None else v
+                                for k,v in ellipse_args.items()}
             
         # -------------
         # - SEP Input 
@@ -917,48 +1628,35 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
         # -----------------
         # - Variance Trick
         var = kwargs.pop("var",self.var)
+        mask = self.datamask
+        # -----------------
+        # - Lazy data: only read the pixels covered by the apertures
+        if on == "data" and self.is_lazy():
+            data, var, mask, x, y = self._get_aperture_region_(x, y, var, mask,
+                                        self._get_aperture_extent_(aptype, r_pixels,
+                                                                   ellipse_args, annular_args))
+        else:
+            data = eval("self.%s"%on)
         # ------------------------
         # - Do the Aperture Photo
         # ----------------------
         # - GAIN MEANS Conversion factor between data array units and poisson counts,
         # gain = ADU per Electron, data = ADU/s
-        
-        # - Circle
-        if aptype == "circle":
-            return sep.sum_circle( eval("self.%s"%on), x, y, r_pixels,subpix=subpix,
-                            var=var,gain=gain, mask=self.datamask,**kwargs)
-
-        # - Annulus
-        if aptype == "circann":
-            
-            if np.asarray([k is None for k in annular_args.values()]).any():
-                raise ValueError("You must set the annular arguments 'annular_arg'")
-            
-            rin,rout = [annular_args[k] for k in ["rin","rout"]]
-            sepout= sep.sum_circann(eval("self.%s"%on),x,y,rin,rout,
-                                  r_pixels,subpix=subpix,
-                                  var=var,gain=gain,mask=self.datamask,**kwargs)
-        # - Ellipse
-        elif aptype == "ellipse":
-            if np.asarray([k is None for k in ellipse_args.values()]).any():
-                raise ValueError("You must set the ellipse arguments 'ellipse_arg'")
-            
-            a,b,theta = [ellipse_args[k] for k in ["a","b","theta"]]
-            sepout= sep.sum_ellipse(eval("self.%s"%on),x,y,a,b,theta,
-                                    r_pixels,subpix=subpix,
-                                    var=var,gain=gain,mask=self.datamask,**kwargs)
-        # - Elliptical Annulus
-        elif aptype == "ellipan":
-            if np.asarray([k is None for k in ellipse_args.values()]).any():
-                raise ValueError("You must set the ellipse arguments 'ellipse_arg'")
-            if np.asarray([k is None for k in annular_args.values()]).any():
-                raise ValueError("You must set the annular arguments 'annular_arg'")
-            
-            rin,rout = [annular_args[k] for k in ["rin","rout"]]
-            a,b,theta = [ellipse_args[k] for k in ["a","b","theta"]]
-            sepout= sep.sum_ellipan(eval("self.%s"%on),x,y,a,b,theta,rin,rout,
-                                    r_pixels,subpix=subpix,
-                                    var=var,gain=gain,mask=self.datamask,**kwargs)
+        if aptype in ["circann","ellipan"] and \
+          np.asarray([k is None for k in annular_args.values()]).any():
+            raise ValueError("You must set the annular arguments 'annular_arg'")
+        if aptype in ["ellipse","ellipan"] and \
+          np.asarray([k is None for k in ellipse_args.values()]).any():
+            raise ValueError("You must set the ellipse arguments 'ellipse_arg'")
+
+        sepprop = kwargs_update(dict(subpix=subpix, var=var, gain=gain, mask=mask),
+                                **kwargs)
+        if n_workers is not None and n_workers > 1 and np.size(x) > n_workers:
+            sepout = _sum_aperture_chunks_(n_workers, data, x, y, aptype, r_pixels,
+                                           ellipse_args, annular_args, **sepprop)
+        else:
+            sepout = _sum_aperture_(data, x, y, aptype, r_pixels,
+                                    ellipse_args, annular_args, **sepprop)
 
         if syserr is not None:
             fl_,err_,flag_ = sepout
@@ -970,6 +1668,47 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
         return sepout
 
     
+    def _aperture_to_photopointarray_(self, count, err, flag,
+                                      coords=None, wcs_coords=False):
+        """ convert the aperture output into a PhotoPointArray.
+        (The counts are not converted into flux, see Instrument) """
+        return get_photopointarray(count, np.asarray(err)**2, flags=flag,
+                                   coords=coords, wcs_coords=wcs_coords,
+                                   source="image")
+    
+    def _get_aperture_extent_(self, aptype, r_pixels, ellipse_args, annular_args):
+        """ maximum distance (in pixels) between an aperture center and its edge """
+        if aptype in ["circann","ellipan"]:
+            radius = annular_args["rout"]
+        else:
+            radius = r_pixels
+        if aptype in ["ellipse","ellipan"]:
+            radius = np.nanmax(np.asarray(ellipse_args["a"])*radius)
+        return np.nanmax(np.asarray(radius, dtype="float"))
+
+    def _get_aperture_region_(self, x, y, var, mask, extent):
+        """ returns the data, var and mask restricted to the box containing
+        all the apertures, and the x, y positions within this box. """
+        x, y = np.asarray(x, dtype="float"), np.asarray(y, dtype="float")
+        if np.size(x) == 0 or not np.any(x==x):
+            return self.data, var, mask, x, y
+        
+        # 1 pixel margin so the sep flags (truncation) are unchanged
+        xmin = int(np.max([np.floor(np.nanmin(x) - extent) - 1, 0]))
+        xmax = int(np.min([np.ceil(np.nanmax(x) + extent) + 2, self.width]))
+        ymin = int(np.max([np.floor(np.nanmin(y) - extent) - 1, 0]))
+        ymax = int(np.min([np.ceil(np.nanmax(y) + extent) + 2, self.height]))
+        if xmin >= xmax or ymin >= ymax:
+            return self.data, var, mask, x, y
+        
+        data = self.get_data_region([ymin,ymax],[xmin,xmax])
+        if var is not None and np.ndim(var) == 2:
+            var = np.ascontiguousarray(var[ymin:ymax,xmin:xmax])
+        if mask is not None:
+            mask = np.ascontiguousarray(mask[ymin:ymax,xmin:xmax])
+            
+        return data, var, mask, x-xmin, y-ymin
+    
     # ------------------- #
     # - WCS Tools       - #
     # ------------------- #
@@ -994,6 +1733,65 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
     # ------------------- #
     #   SEP Tools         #
     # ------------------- #
+    def set_sep_tiling(self, ntiles, nprocess=None, overlap=64):
+        """ Run the sep background estimation and source extraction per tile,
+        the tiles being processed in parallel by a pool of processes.
+        The results are merged back in full frame coordinates (a unique
+        background and a unique sepobjects).
+
+        Parameters
+        ----------
+        ntiles: [int or 2-array/None]
+            Number of tiles along each axis (ntiles_y, ntiles_x). If int, the
+            same is used for both axis. Set None to go back to full frame estimations.
+
+        nprocess: [int/None] -optional-
+            Number of processes used. None means the number of cpus.
+
+        overlap: [int] -optional-
+            Size (in pixels) of the overlap between tiles. A source is kept
+            from the tile that contains its center, hence the overlap should be
+            larger than the typical size of the sources.
+            The tile backgrounds are blended (linear weights) over the overlap.
+            
+        Returns
+        -------
+        Void
+        """
+        if ntiles is None:
+            self._build_properties["septiling"] = None
+            return
+        
+        self._build_properties["septiling"] = {"ntiles":ntiles,
+                                               "nprocess":nprocess,
+                                               "overlap":overlap}
+
+    def set_background_cache(self, memory=True, sidecar=False):
+        """ Define how the sep backgrounds are cached (no caching by default).
+        A background is re-used when the pixels, the mask and the box parameters
+        are unchanged. Pixels read from a file are identified by the file, its
+        modification time, the extension and the slicing (their content is
+        hashed otherwise). The cached background arrays are read-only.
+
+        Parameters
+        ----------
+        memory: [bool] -optional-
+            Use the in-memory cache shared by all images (BACKGROUND_CACHE, LRU)
+
+        sidecar: [bool] -optional-
+            Store the background in a .npz file next to the fits file
+            (filename+'.bkgd.npz') so that it is re-used by later runs.
+
+        Returns
+        -------
+        Void
+        """
+        self._build_properties["bkgdcache"] = {"memory":memory, "sidecar":sidecar}
+        
+    def has_sep_tiling(self):
+        """ Are sep background and extraction made per tile (see set_sep_tiling) """
+        return self._build_properties.get("septiling", None) is not None
+    
     def get_sep_background(self, doublepass=True,
                            update_background=True,
                            clean_sep=True,**kwargs):
@@ -1007,6 +1805,8 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
             # - First loop get the first exposure
             if hasattr(self,"_rmsep") and self._rmsep:
                 self._derived_properties["sepobjects"] = None
+                self._derived_properties["sepoutput"]  = None
+                self._reset_sep_masks_()
                 # -- No need to conserve that
                 del self._rmsep
 
@@ -1083,21 +1883,20 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
         Void [or ndarray(sep.extract output) is returnobjects set to True]
         """
         from sep import extract
-        from collections import get_sepobject
-
         
         if thresh is not None:
             min_objects = None
             
         thresh = self._get_sep_threshold_(thresh)
             
-        o = extract(eval("self.%s"%on), thresh,**kwargs)
+        if self.has_sep_tiling():
+            # - lazy data: only computed per tile (see _sep_extract_tiled_)
+            o = self._sep_extract_tiled_(None if on == "data" and self.is_lazy() else
+                                         eval("self.%s"%on), thresh, **kwargs)
+        else:
+            o = extract(eval("self.%s"%on), thresh,**kwargs)
         
-        # -- If this is an instrument and not an image
-        instrument_prop = {'lbda':self.lbda,"mjd":self.mjd,
-                           "bandname":self.bandname} if hasattr(self,"lbda") else\
-                           {}
-        sepobjects = get_sepobject(o, ppointkwargs=instrument_prop)
+        sepobjects = self._sepoutput_to_sepobjects_(o)
         # ----------- #
         #  What next? #
         # ----------- #
@@ -1110,11 +1909,9 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
                                matching_distance=matching_distance, min_objects=None,
                                **kwargs)
         # - Yes? Good
+        self._derived_properties["sepoutput"]  = o
         self._derived_properties["sepobjects"] = sepobjects
-          
-
-        if self.has_wcs():
-            self.sepobjects.set_wcs(self.wcs)
+        self._reset_sep_masks_()
 
         if set_catalogue and self.has_catalogue():
             # by give the catalogue and not a copy, the matching information
@@ -1131,6 +1928,40 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
         if returnobjects:
             return self.sepobjects
         
+    def _sepoutput_to_sepobjects_(self, sepoutput):
+        """ SepObject (with the current wcs solution) of the given sep.extract output """
+        from collections import get_sepobject
+        # -- If this is an instrument and not an image
+        instrument_prop = {'lbda':self.lbda,"mjd":self.mjd,
+                           "bandname":self.bandname} if hasattr(self,"lbda") else\
+                           {}
+        sepobjects = get_sepobject(sepoutput, ppointkwargs=instrument_prop)
+        if self.has_wcs():
+            sepobjects.set_wcs(self.wcs)
+        return sepobjects
+        
+    def _sep_extract_tiled_(self, data, thresh, **kwargs):
+        """ sep.extract ran per tile in a pool of processes (see set_sep_tiling).
+        data=None means the tiles of get_data_region (lazy mode).
+        Returns the concatenated sep outputs (full frame coordinates) """
+        from multiprocessing import cpu_count
+        tiling = self._build_properties["septiling"]
+        shape  = np.shape(data) if data is not None else self.shape
+        tiles  = get_image_tiles(shape, tiling["ntiles"], tiling["overlap"])
+        def get_args():
+            # - generator: the (lazy) tiles are only read once a worker is available
+            for core, (y0,y1,x0,x1) in tiles:
+                # - full frame arrays given to sep (err, var, mask) are tiled too
+                kwargs_tile = {k:v[y0:y1,x0:x1] if np.ndim(v)==2 and np.shape(v)==shape else v
+                               for k,v in kwargs.items()}
+                yield [data[y0:y1,x0:x1] if data is not None else
+                       self.get_data_region([y0,y1],[x0,x1]),
+                       thresh, core, [y0,y1,x0,x1], kwargs_tile]
+                
+        nprocess = tiling["nprocess"] if tiling["nprocess"] is not None else cpu_count()
+        return np.concatenate(_map_in_pool_(_sep_extract_tile_, get_args(),
+                                            nprocess=nprocess, maxinflight=nprocess))
+    
     def _get_sep_extract_threshold_(self):
         """this will be used as a default threshold for sep_extract"""
         #print "_get_sep_extract_threshold_ called"
@@ -1242,6 +2073,9 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
             raise TypeError("'toshow' must be a string (self.'toshow') or a np.ndarray)"%toshow)
         elif not hasattr(self,toshow):
             raise ValueError("'%s' is not a known image parameter"%toshow)
+        elif toshow == "data" and self.is_lazy() and zoomon is not None:
+            # - lazy mode: the zoomed area is the only one computed (see below)
+            valuetoshow = "lazy"
         else:
             valuetoshow = eval("self.%s"%toshow)
         if valuetoshow is None:
@@ -1263,6 +2097,20 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
         else:
             fig = ax.figure
         # ----------- #
+        # - Lazy Zoom
+        lazyextent = None
+        if type(valuetoshow) is str and valuetoshow == "lazy":
+            coords_zoom = self.coords_to_pixel(*self.target.radec) \
+              if type(zoomon) is str and zoomon=="target" and self.has_target() else zoomon
+            if np.shape(coords_zoom) != (2,):
+                valuetoshow = self.data
+            else:
+                width = (zoom * self.units_to_pixels(zunits)).value
+                x0,x1 = [int(np.clip(coords_zoom[0]+w_, 0, self.width))  for w_ in [-width,width+1]]
+                y0,y1 = [int(np.clip(coords_zoom[1]+w_, 0, self.height)) for w_ in [-width,width+1]]
+                valuetoshow = self.get_data_region([y0,y1],[x0,x1])
+                lazyextent  = [x0-0.5,x1-0.5,y0-0.5,y1-0.5]
+        # ----------- #
         # -  What
         x = np.log10(valuetoshow) if logscale else valuetoshow
         
@@ -1273,6 +2121,8 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
             "origin":"lower",
             "cmap":mpl.cm.binary
             }
+        if lazyextent is not None:
+            default_prop["extent"] = lazyextent
             
         prop = kwargs_update(default_prop,**kwargs)
 
@@ -1454,7 +2304,8 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
 
     def show_backgroundresidual(self, **kwargs):
         """ """
-        backgroudsource = self.data.copy()
+        # - lazy data already are a new array
+        backgroudsource = self.data if self.is_lazy() else self.data.copy()
         if self.backgroundmask is not None:
             backgroudsource[self.backgroundmask] = np.NaN
         return self.show(backgroudsource, **kwargs)
@@ -1548,7 +2399,48 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
     
     @property
     def data(self):
+        if self._derived_properties["data"] is None and self.is_lazy() \
+          and self.rawdata is not None:
+            # - not recorded on purpose: see load(lazy=True)
+            return self.get_data_region()
         return self._derived_properties["data"]
+
+    def is_lazy(self):
+        """ Is 'data' computed on flight from the (memory mapped) rawdata
+        instead of being stored (see load(lazy=True)) """
+        return self._build_properties.get("lazydata", False)
+
+    @property
+    def _lazydtype(self):
+        """ (native byte order) type of the pixels computed in lazy mode """
+        dtype = self._build_properties.get("dtype", None)
+        return np.dtype("float" if dtype is None else dtype).newbyteorder("=")
+    
+    def get_data_region(self, dataslice0=None, dataslice1=None):
+        """ get the (background subtracted) data within the given pixel boundaries.
+        In lazy mode (see load) only these pixels are read and subtracted.
+
+        Parameters
+        ----------
+        dataslice0, dataslice1: [2D-array, 2D-array] -optional-
+            [min,max] boundaries of the first ("slow", y) and second ("fast", x)
+            axis. None means no limits.
+
+        Returns
+        -------
+        2D array
+        """
+        slice0 = slice(*dataslice0) if dataslice0 is not None else slice(None)
+        slice1 = slice(*dataslice1) if dataslice1 is not None else slice(None)
+        if not self.is_lazy():
+            return self.data[slice0,slice1]
+        
+        data = np.array(self.rawdata[slice0,slice1], dtype=self._lazydtype)
+        if self.background is not None:
+            data -= self.background if np.ndim(self.background) == 0 else \
+              self.background[slice0,slice1]
+        return data
+    
     # -------
     # -- This under defines the data
     # Raw Data
@@ -1604,7 +2496,9 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
     
     @property
     def backgroundmask(self):
-        return self._derived_properties["backgroundmask"]
+        """ mask of the background estimation (built from the mask plane) """
+        return self.get_bitmask("background") \
+          if self._derived_properties["backgroundmask"] else None
     
     # -- Header stuff
     @property
@@ -1673,17 +2567,117 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
     # -- SEP OUTPUT
     @property
     def sepobjects(self):
+        if self._derived_properties["sepobjects"] is None and \
+          self._derived_properties["sepoutput"] is not None:
+            # - cutouts only have the sep output (see get_cutout)
+            self._derived_properties["sepobjects"] = \
+              self._sepoutput_to_sepobjects_(self._derived_properties["sepoutput"])
         return self._derived_properties["sepobjects"]
 
+    @property
+    def _emptysky(self):
+        """ cache of get_emptysky_pixels """
+        if self._derived_properties["emptysky"] is None:
+            self._derived_properties["emptysky"] = {}
+        return self._derived_properties["emptysky"]
+    
     def has_sepobjects(self):
         return True if self.sepobjects is not None and self.sepobjects.has_data() \
           else False
           
     def derive_sepmask(self, r):
-        """ area where SEP detected an object scaled up by `r`. See derive_sepmask"""
+        """ area where SEP detected an object scaled up by `r`.
+        The mask is stored (once per `r`) in the mask plane, see get_bitmask."""
         if not self.has_sepobjects():
             raise AttributeError("No sepobjects loaded. Run sep_extract")
-        return self.sepobjects.get_ellipse_mask(self.width,self.height,r=r)
+        name = get_sepmask_name(r)
+        if name not in self._maskbits:
+            self.set_bitmask(name, self.sepobjects.get_ellipse_mask(self.width,self.height,r=r))
+        return self.get_bitmask(name)
+
+    # ----------------
+    # -- Mask Plane
+    @property
+    def maskplane(self):
+        """ uint16 array (image shape) where the masks are stored as named bits.
+        See get_bitmask, set_bitmask."""
+        if self._derived_properties["maskplane"] is None:
+            self._derived_properties["maskplane"] = np.zeros(self.shape, dtype="uint16")
+            self._derived_properties["maskbits"]  = MASKBITS.copy()
+            # - names of the attributed bits, in the order they were attributed
+            self._derived_properties["maskbitorder"] = []
+            if self.has_datamask():
+                self.set_bitmask("datamask", self.datamask)
+        return self._derived_properties["maskplane"]
+
+    @property
+    def _maskbits(self):
+        """ dictionary {name: bit} of the masks stored in the mask plane """
+        if self._derived_properties["maskbits"] is None:
+            _ = self.maskplane
+        return self._derived_properties["maskbits"]
+    
+    def set_bitmask(self, name, mask):
+        """ Store the boolean `mask` in the bit `name` of the mask plane.
+        The known names are 'datamask' and 'background', any other name
+        (e.g. for user masks) is attributed a free bit. 
+        
+        Returns
+        -------
+        Void
+        """
+        bit = self._get_maskbit_(name)
+        plane = self.maskplane
+        np.bitwise_and(plane, np.uint16(~(1<<bit) & 0xFFFF), out=plane)
+        if mask is not None:
+            np.bitwise_or(plane, np.uint16(1<<bit), out=plane,
+                          where=np.asarray(mask, dtype="bool"))
+            
+    def get_bitmask(self, names):
+        """ Boolean array, True where any of the given masks (names) is True.
+        (see set_bitmask). Unknown names are ignored.
+
+        Returns
+        -------
+        2D bool array
+        """
+        names = [names] if isinstance(names, basestring) else names
+        bits = np.uint16(np.sum([1<<self._maskbits[n] for n in names if n in self._maskbits]))
+        return (self.maskplane & bits) != 0
+
+    def remove_bitmask(self, name):
+        """ Clear and free the bit `name` of the mask plane """
+        if name not in self._maskbits:
+            return
+        self.set_bitmask(name, None)
+        if name not in MASKBITS:
+            self._maskbits.pop(name)
+            self._derived_properties["maskbitorder"].remove(name)
+
+    def _get_maskbit_(self, name):
+        """ bit of the mask plane associated to the given name (attributed if new) """
+        if name in self._maskbits:
+            return self._maskbits[name]
+        free = [b for b in range(MASKPLANE_NBITS) if b not in self._maskbits.values()]
+        if len(free) == 0:
+            # - Drop the oldest sep mask (first attributed), they can be rasterized again
+            sepnames = [n for n in self._derived_properties["maskbitorder"]
+                        if n.startswith("sep_r")]
+            if len(sepnames) == 0:
+                raise ValueError("No free bit left in the mask plane")
+            self.remove_bitmask(sepnames[0])
+            return self._get_maskbit_(name)
+        self._maskbits[name] = free[0]
+        self._derived_properties["maskbitorder"].append(name)
+        return free[0]
+
+    def _reset_sep_masks_(self):
+        """ drop the masks derived from the sepobjects (emptysky pixels and sep mask bits) """
+        self._derived_properties["emptysky"] = None
+        if self._derived_properties["maskbits"] is not None:
+            for name in self._maskbits.keys():
+                if name.startswith("sep_r"):
+                    self.remove_bitmask(name)
     
     # FWHM
     @property
@@ -1715,6 +2709,10 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
         
         self._properties["rawdata"]   = self._read_rawdata_(rawdata)
         self._properties["var"]       = variance
+        self._derived_properties["maskplane"] = None
+        self._derived_properties["maskbits"]  = None
+        self._derived_properties["maskbitorder"] = None
+        self._derived_properties["backgroundmask"] = None
         
         if mask is not None:
             self.set_datamask(mask)
@@ -1726,6 +2724,9 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
             self._update_(update_background=False)
     
     def _read_rawdata_(self,rawdata):
+        if self.is_lazy():
+            # - No copy, the memory map view is kept (see get_data_region)
+            return rawdata
         return np.asarray(rawdata,dtype="float")
     
     def _get_default_variance_(self):
@@ -1741,51 +2742,122 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
 
     
     def _measure_sep_background_(self,scaleup_sepmask=10, add_mask=None,
-                                    apply_sepmask=True, **kwargs):
+                                    apply_sepmask=True, mask=None, **kwargs):
+        """ measure the sep background. The pixels masked are those of the datamask,
+        of the sep objects (if apply_sepmask) and of add_mask, unless `mask` is given.
+        The mask used is stored in the 'background' bit of the mask plane.
         """
-        """
-        from sep import Background
-        
         if self.rawdata is None:
             raise ValueError("no 'rawdata' loaded. Cannot get a background")
         
         # --------------
-        # -- Mask issue
-        if self.has_datamask():
-            maskdata = self.datamask
-        else:
-            maskdata = None
-            
-        if self.has_sepobjects() and apply_sepmask:
-            masksep = self.derive_sepmask(scaleup_sepmask)
-            mask = masksep+maskdata if maskdata is not None else\
-              masksep
-        else:
-            mask = maskdata
-
+        # -- Mask issue (combined in the mask plane)
+        if mask is None:
+            masknames = ["datamask"] if self.has_datamask() else []
+            if self.has_sepobjects() and apply_sepmask:
+                self.derive_sepmask(scaleup_sepmask)
+                masknames.append(get_sepmask_name(scaleup_sepmask))
             
-        if add_mask is not None:
-            if np.shape(add_mask) != self.shape:
-                raise ValueError(" the input add_mask does not have the requested shape", np.shape(add_mask), self.shape)
-            mask = mask + add_mask if mask is not None else add_mask
+            mask = self.get_bitmask(masknames) if len(masknames)>0 else None
+        
+            if add_mask is not None:
+                if np.shape(add_mask) != self.shape:
+                    raise ValueError(" the input add_mask does not have the requested shape", np.shape(add_mask), self.shape)
+                mask = mask | np.asarray(add_mask, dtype="bool") if mask is not None else add_mask
             
         # ---------------
-        # - masking sign tested
-        self._derived_properties["backgroundmask"] = mask
+        # - masking sign tested (only kept in the mask plane, see backgroundmask)
+        self._derived_properties["backgroundmask"] = mask is not None
+        self.set_bitmask("background", mask)
         
         if self._build_properties["bkgdbox"]['bh'] == "max":
              self._build_properties["bkgdbox"]['bh'] = self.height-1
         if self._build_properties["bkgdbox"]['bw'] == "max":
              self._build_properties["bkgdbox"]['bw'] = self.width-1
 
-        build_prop = kwargs_update(self._build_properties["bkgdbox"],
-                                   **{"mask":self.backgroundmask})
-        
-        self._sepbackground_prop = kwargs_update(build_prop,
+        # (the mask is not part of the stored properties)
+        self._sepbackground_prop = kwargs_update(self._build_properties["bkgdbox"],
                                                   **kwargs)
         
-        self._sepbackground = Background(self.rawdata,
-                                         **self._sepbackground_prop)
+        # -- Already measured ?
+        cacheprop = self._build_properties.get("bkgdcache", None)
+        if cacheprop is None or not np.any(cacheprop.values()):
+            self._sepbackground = self._build_sep_background_(self.rawdata, mask)
+            return
+        
+        key = self._get_background_cachekey_(mask)
+        sidecar = self.filename+".bkgd.npz" \
+          if cacheprop["sidecar"] and self.filename is not None else None
+        
+        background = BACKGROUND_CACHE.get(key) if cacheprop["memory"] else None
+        if background is None and sidecar is not None:
+            background = _SepBackgroundModel_.from_file(sidecar, key=key)
+            
+        if background is None:
+            background = self._build_sep_background_(self.rawdata, mask)
+            if sidecar is not None:
+                background.writeto(sidecar, key=key)
+                
+        if cacheprop["memory"]:
+            BACKGROUND_CACHE[key] = background.set_readonly()
+            
+        self._sepbackground = background
+
+    def _get_background_cachekey_(self, mask):
+        """ key of the background cache (see set_background_cache) """
+        prop = kwargs_update(self._sepbackground_prop,
+                             tiling=self._build_properties.get("septiling", None),
+                             maskhash=array_hash(None if mask is None else
+                                                 np.packbits(np.asarray(mask, dtype="bool"))))
+        if not self._is_file_rawdata_():
+            return array_hash(self.rawdata, **prop)
+        import os
+        return array_hash(filename=os.path.abspath(self.filename),
+                          mtime=os.path.getmtime(self.filename),
+                          index=self._build_properties["data_index"],
+                          dataslice0=self._build_properties["dataslice0"],
+                          dataslice1=self._build_properties["dataslice1"], **prop)
+
+    def _is_file_rawdata_(self):
+        """ test if the rawdata are (a view of) the data of the fits file """
+        if self.filename is None or self.fits is None or self.rawdata is None:
+            return False
+        try:
+            return np.may_share_memory(self.rawdata,
+                                       self.fits[self._build_properties["data_index"]].data)
+        except Exception:
+            return False
+
+    def _build_sep_background_(self, rawdata, mask=None):
+        """ measure the sep background (see _measure_sep_background_).
+        sep requires native byte order pixels, which the fits memmap may not have:
+        the pixels are converted (per tile if set_sep_tiling is used) only if needed. """
+        from sep import Background
+        dtype = self._lazydtype if self.is_lazy() else None
+        if self.has_sep_tiling():
+            return self._measure_tiled_background_(rawdata, mask=mask, dtype=dtype,
+                                                   **self._sepbackground_prop)
+        return _SepBackgroundModel_.from_sep(Background(_sep_native_array_(rawdata, dtype),
+                                                        mask=mask,
+                                                        **self._sepbackground_prop))
+
+    def _measure_tiled_background_(self, rawdata, mask=None, dtype=None, **kwargs):
+        """ sep.Background measured per tile in a pool of processes and stitched
+        back together (see set_sep_tiling) """
+        tiling = self._build_properties["septiling"]
+        tiles  = get_image_tiles(np.shape(rawdata), tiling["ntiles"], tiling["overlap"])
+        args   = []
+        for core, (y0,y1,x0,x1) in tiles:
+            prop = kwargs_update(kwargs, **{"mask":mask[y0:y1,x0:x1] if mask is not None else None})
+            # - the boxes cannot be larger than the tile
+            for box,size in [["bh",y1-y0],["bw",x1-x0]]:
+                if box in prop.keys() and prop[box] > size:
+                    prop[box] = size
+            args.append([rawdata[y0:y1,x0:x1], prop, dtype])
+            
+        return _TiledSepBackground_(np.shape(rawdata), tiles,
+                                    _map_in_pool_(_sep_background_tile_, args,
+                                                  nprocess=tiling["nprocess"]))
         
     def _update_(self,update_background=True):
         """The module derives the 'derived_properties' based on the
@@ -1801,10 +2873,15 @@ class Image( TargetHandler, WCSHandler, CatalogueHandler ):
         """
         if update_background:
             if hasattr(self,"_sepbackground"):
-                self._measure_sep_background_(**self._sepbackground_prop)
+                self._measure_sep_background_(mask=self.backgroundmask,
+                                              **self._sepbackground_prop)
                 if self._uses_default_background:
                     self.set_background(self._get_default_background_(),force_it=True)
-                
+        if self.is_lazy():
+            # data is computed on flight. See get_data_region()
+            self._derived_properties["data"] = None
+            return
+        
         self._derived_properties["data"] = self.rawdata - self.background
 
 
@@ -2613,3 +3690,341 @@ class CountsPhotoPoint( BasePhotoPoint ):
 
     
 
+# ========================== #
+#                            #
+#  Columnar PhotoPoints      #
+#                            #
+# ========================== #
+class PhotoPointArray( BaseObject ):
+    """ Columnar container of photometric points.
+
+    Each parameter (flux, var, lbda, mjd, zp, bandname, flags) is stored
+    as a numpy array with one entry per point, so no PhotoPoint object
+    is created until you explicitly request one (see get_photopoint).
+    This is the natural output for aperture photometry on many positions.
+    """
+    __nature__ = "PhotoPointArray"
+
+    PROPERTIES         = ["flux","var","flags"]
+    SIDE_PROPERTIES    = ["lbda","mjd","bandname","zp","zpsys",
+                          "source","instrument_name","coords","meta"]
+    DERIVED_PROPERTIES = ["table"]
+
+    # =========================== #
+    # = Constructor             = #
+    # =========================== #
+    def __init__(self, flux=None, var=None, flags=None,
+                 empty=False, **kwargs):
+        """
+        Initialize the PhotoPointArray object
+
+        Parameters
+        ----------
+        flux, var: [array, array/None]
+            Fluxes and variances. The variances can be set to None
+
+        flags: [array] -optional-
+            Flags associated to the points (0 if None)
+
+        empty: [bool] -optional-
+            Set True to return an empty object.
+
+        **kwargs goes to the method `create`
+
+        Returns
+        -------
+        Void
+        """
+        self.__build__()
+        self._build_properties["wcs_coords"] = False
+        if empty or flux is None:
+            return
+        self.create(flux, var, flags=flags, **kwargs)
+
+    def create(self, flux, var, flags=None,
+               lbda=None, mjd=None, zp=None, bandname=None, zpsys="ab",
+               coords=None, wcs_coords=False,
+               source=None, instrument_name=None, **meta):
+        """ builds the core of the object by setting the columns.
+
+        Parameters
+        ----------
+        flux, var: [array, array/None]
+            Fluxes and variances. The variances can be set to None
+
+        flags: [array] -optional-
+            Flags associated to the points (0 if None)
+
+        lbda, mjd, zp, bandname: [float/string or array] -optional-
+            Unique value or one value per point.
+
+        coords: [2D-array] -optional-
+            [[x0,y0],[x1,y1] etc.] positions of the points.
+
+        wcs_coords: [bool] -optional-
+            True if the coords are Ra,Dec, False if they are pixel coordinates.
+
+        source, instrument_name: [strings] -optional-
+            source: method used the measure the points (e.g. image, spectrum...)
+            instrument_name: instrument used to measure them (e.g. sdss)
+
+        **meta: extra columns (unique value or one value per point)
+
+        Returns
+        -------
+        Void
+        """
+        flux = np.atleast_1d(np.asarray(flux, dtype="float"))
+        npoints = len(flux)
+        
+        self._properties["flux"]  = flux
+        self._properties["var"]   = np.ones(npoints)*np.NaN if var is None else \
+          self._to_column_(var, npoints, dtype="float")
+        self._properties["flags"] = self._to_column_(0 if flags is None else flags,
+                                                     npoints, dtype="int")
+        # -- Shared information
+        self._side_properties["lbda"]     = self._to_column_(np.NaN if lbda is None else lbda,
+                                                             npoints, dtype="float")
+        self._side_properties["mjd"]      = self._to_column_(np.NaN if mjd is None else mjd,
+                                                             npoints, dtype="float")
+        self._side_properties["zp"]       = self._to_column_(np.NaN if zp is None else zp,
+                                                             npoints, dtype="float")
+        self._side_properties["bandname"] = self._to_column_("" if bandname is None else bandname,
+                                                             npoints, dtype="str")
+        self._side_properties["zpsys"]           = zpsys
+        self._side_properties["source"]          = source
+        self._side_properties["instrument_name"] = instrument_name
+        self._side_properties["meta"] = {k:self._to_column_(v, npoints) for k,v in meta.items()}
+        # -- Positions
+        self.set_coords(coords, wcs_coords=wcs_coords)
+
+    def set_coords(self, coords, wcs_coords=False):
+        """ attach the coordinates [[x0,y0],[x1,y1] etc.] of the points. """
+        if coords is not None:
+            coords = np.asarray(coords, dtype="float")
+            if np.shape(coords) == (2,):
+                coords = coords[None,:]
+            if np.shape(coords) != (self.nsources, 2):
+                raise ValueError("coords must have a shape of (%d,2)"%self.nsources)
+            
+        self._side_properties["coords"]      = coords
+        self._build_properties["wcs_coords"] = wcs_coords
+        self._derived_properties["table"]    = None
+
+    # =========================== #
+    # = Main Methods            = #
+    # =========================== #
+    def get(self, key, mask=None):
+        """ Get the column(s) associated to the given key (or list of keys).
+        Known keys are the properties of the instance (flux, var, mag...)
+        and the meta keys.
+
+        Returns
+        -------
+        array (N-array or NxM-array if list of keys)
+        """
+        if hasattr(key, "__iter__"):
+            return np.asarray([self.get(key_, mask=mask) for key_ in key]).T
+        
+        if key in self.meta.keys():
+            column = self.meta[key]
+        elif key in ["x","ra"]:
+            column = self._get_coords_(key)[:,0]
+        elif key in ["y","dec"]:
+            column = self._get_coords_(key)[:,1]
+        elif key in dir(self):
+            column = getattr(self, key)
+        else:
+            raise ValueError("No instance or meta key %s "%key)
+        
+        return column if mask is None else column[mask]
+
+    def get_photopoint(self, index):
+        """ Build the PhotoPoint corresponding to the `index` entry. """
+        return get_photopoint(flux=self.flux[index], var=self.var[index],
+                              lbda=self.lbda[index] if self.lbda[index]==self.lbda[index] else None,
+                              mjd=self.mjd[index] if self.mjd[index]==self.mjd[index] else None,
+                              zp=self.zp[index] if self.zp[index]==self.zp[index] else None,
+                              bandname=self.bandname[index] if len(self.bandname[index])>0 else None,
+                              zpsys=self.zpsys, source=self.source,
+                              instrument_name=self.instrument_name,
+                              flag=self.flags[index],
+                              **{k:v[index] for k,v in self.meta.items()})
+
+    def get_photopoints(self, mask=None):
+        """ List of PhotoPoints. (This is the slow path, each entry become an object) """
+        index = np.arange(self.nsources) if mask is None else \
+          np.arange(self.nsources)[mask]
+        return [self.get_photopoint(i) for i in index]
+    
+    # ------------------- #
+    # - Convertion      - #
+    # ------------------- #
+    def to_table(self, include_meta=True):
+        """ astropy Table containing the data (one row per point).
+        The columns are the arrays of the instance, no copy per row is made.
+
+        Returns
+        -------
+        astropy.Table
+        """
+        if self._derived_properties["table"] is None or \
+          self._derived_properties["table"]["include_meta"] != include_meta:
+            names = ["id","flux","var","lbda","mjd","bandname","zp","flags"]
+            data  = [np.arange(self.nsources), self.flux, self.var, self.lbda,
+                     self.mjd, self.bandname, self.zp, self.flags]
+            if self.has_coords():
+                names += ["ra","dec"] if self.wcs_coords else ["x","y"]
+                data  += [self.coords[:,0], self.coords[:,1]]
+            if include_meta:
+                names += self.meta.keys()
+                data  += self.meta.values()
+            
+            self._derived_properties["table"] = {"include_meta":include_meta,
+                                                 "table":Table(data=data, names=names,
+                                                               copy=False)}
+            
+        return self._derived_properties["table"]["table"]
+    
+    def to_photomap(self, wcs=None, catalogue=None, **kwargs):
+        """ Convert the instance into a PhotoMap (Collection of PhotoPoints)
+        that is table-based, hence no PhotoPoint is created.
+
+        Parameters
+        ----------
+        wcs: [astrobject's WCS] -optional-
+            Attach a wcs solution to the PhotoMap.
+
+        catalogue: [astrobject's Catalogue] -optional-
+            Attach a catalogue to the PhotoMap.
+
+        **kwargs goes to the PhotoMap's set_catalogue()
+
+        Returns
+        -------
+        PhotoMap
+        """
+        if not self.has_coords():
+            raise AttributeError("No 'coords' set. A PhotoMap requires coordinates (see set_coords)")
+        
+        from .collections import PhotoMap
+        pmap = PhotoMap(empty=True)
+        pmap.create_from_table(self.to_table(), idkey="id")
+        pmap._build_properties["wcsid"] = self.wcs_coords
+        if wcs is not None:
+            pmap.set_wcs(wcs)
+        if catalogue is not None:
+            pmap.set_catalogue(catalogue, **kwargs)
+        return pmap
+    
+    # =========================== #
+    # = Internal Tools          = #
+    # =========================== #
+    def _to_column_(self, value, npoints, dtype=None):
+        """ Broadcast the given value into a column of size npoints """
+        if not hasattr(value, "__iter__"):
+            return np.asarray([value]*npoints, dtype=dtype)
+        
+        value = np.asarray(value, dtype=dtype)
+        if len(value) != npoints:
+            raise ValueError("the given column must have the size of flux (%d)"%npoints)
+        return value
+
+    def _get_coords_(self, key):
+        """ returns the coordinate array if it matches the request key """
+        if not self.has_coords():
+            raise AttributeError("No 'coords' set.")
+        if (key in ["ra","dec"]) != self.wcs_coords:
+            raise ValueError("%s not available: the coords are in %s"%(key,
+                                "ra,dec" if self.wcs_coords else "pixels"))
+        return self.coords
+        
+    # =========================== #
+    # = Properties and Settings = #
+    # =========================== #
+    @property
+    def nsources(self):
+        """ number of photometric points """
+        return 0 if self.flux is None else len(self.flux)
+
+    def has_data(self):
+        """ is self.flux defined """
+        return self.flux is not None
+    
+    @property
+    def data(self):
+        """ astropy Table of the data (see to_table) """
+        return self.to_table()
+    
+    # -- Columns
+    @property
+    def flux(self):
+        return self._properties["flux"]
+    
+    @property
+    def var(self):
+        return self._properties["var"]
+
+    @property
+    def flags(self):
+        return self._properties["flags"]
+    
+    @property
+    def lbda(self):
+        """ wavelength associated to the photometric points"""
+        return self._side_properties["lbda"]
+
+    @property
+    def mjd(self):
+        return self._side_properties["mjd"]
+
+    @property
+    def zp(self):
+        return self._side_properties["zp"]
+
+    @property
+    def bandname(self):
+        return self._side_properties["bandname"]
+
+    @property
+    def zpsys(self):
+        return self._side_properties["zpsys"]
+
+    @property
+    def source(self):
+        return self._side_properties["source"]
+
+    @property
+    def instrument_name(self):
+        return self._side_properties["instrument_name"]
+
+    @property
+    def meta(self):
+        if self._side_properties["meta"] is None:
+            self._side_properties["meta"]= {}
+        return self._side_properties["meta"]
+    
+    # -- Coordinates
+    @property
+    def coords(self):
+        """ Nx2 array of the positions of the points (see wcs_coords) """
+        return self._side_properties["coords"]
+
+    def has_coords(self):
+        return self.coords is not None
+
+    @property
+    def wcs_coords(self):
+        """ are the coordinates given in ra,dec (True) or in pixels (False) """
+        return self._build_properties["wcs_coords"]
+    
+    # -- Derived
+    @property
+    def mag(self):
+        """ AB magnitudes (analytical conversion of the flux) """
+        return flux_to_mag(self.flux, None, self.lbda)[0]
+    
+    @property
+    def mag_err(self):
+        """ Errors on the AB magnitudes (first order propagation of the flux errors)"""
+        return flux_to_mag(self.flux, np.sqrt(self.var), self.lbda)[1]
@@ -28,7 +28,15 @@ def get_contour_polygon(x,y):
     if not HAS_SHAPELY:
         raise ImportError(_ERRORMESSAGE)
     
-    points = MultiPoint(np.asarray([x,y]).T)
+    xy = np.asarray([x,y], dtype="float").T
+    if len(xy) > 100:
+        # - shapely is slow to build large MultiPoints: only the hull vertices are needed
+        from scipy.spatial import ConvexHull, qhull
+        try:
+            xy = xy[ConvexHull(xy).vertices]
+        except (qhull.QhullError, ValueError):
+            pass # degenerated (e.g. aligned) points: shapely handles them
+    points = MultiPoint(xy)
     return points.convex_hull
 
 
@@ -58,8 +66,7 @@ def point_in_contours(x,y,contours, all=True):
         if "__iter__" not in dir(x):
             return contours.contains_point([x,y])
         
-        return np.asarray([contours.contains_point([x_,y_])
-                           for x_,y_ in zip(x,y)],dtype=bool)
+        return points_in_contours(x,y,contours)
     
     # ----------------------
     # - Shapely Polygon
@@ -67,8 +74,85 @@ def point_in_contours(x,y,contours, all=True):
         return contours.contains(Point(x,y))
     if all:
         return contours.contains(MultiPoint(np.asarray([x,y]).T))
-    return [contours.contains(Point(x_,y_))
-            for x_,y_ in zip(x,y) ]
+    return points_in_contours(x,y,contours).tolist()
+
+def points_in_contours(x, y, contours):
+    """
+    Vectorized version of point_in_contours: all the points are tested at once
+    (matplotlib Path.contains_points) after a bounding box preselection.
+    The contours could be a:
+      - matplotlib.patches.Polygon ; or
+      - Shapely.geometry.Polygon (holes are accounted for) ; or
+      - Shapely.geometry.MultiPolygon (union of the polygons)
+
+    Return
+    ------
+    bool-array (same shape as x)
+    """
+    from matplotlib.path import Path
+    x, y = np.asarray(x, dtype="float"), np.asarray(y, dtype="float")
+    xy   = np.asarray([x.ravel(), y.ravel()]).T
+    mask = np.zeros(len(xy), dtype=bool)
+    
+    # - list of [exterior, [interiors]] vertices
+    if type(contours) is Polygon:
+        rings = [[contours.get_xy(), []]]
+    elif not HAS_SHAPELY:
+        raise ImportError(_ERRORMESSAGE)
+    elif type(contours) is multipolygon.MultiPolygon:
+        rings = [[np.asarray(p_.exterior.coords), [np.asarray(r_.coords) for r_ in p_.interiors]]
+                 for p_ in contours.geoms]
+    elif type(contours) is polygon.Polygon:
+        rings = [[np.asarray(contours.exterior.coords),
+                  [np.asarray(r_.coords) for r_ in contours.interiors]]]
+    else:
+        raise TypeError("contours must be a matplotlib Polygon or a shapely Polygon/MultiPolygon")
+
+    for exterior, interiors in rings:
+        (xmin, ymin), (xmax, ymax) = exterior.min(axis=0), exterior.max(axis=0)
+        candidates = np.argwhere(~mask & (xy[:,0]>=xmin) & (xy[:,0]<=xmax) &
+                                 (xy[:,1]>=ymin) & (xy[:,1]<=ymax)).ravel()
+        if len(candidates) == 0:
+            continue
+        inside = Path(exterior).contains_points(xy[candidates])
+        for interior in interiors:
+            inside &= ~Path(interior).contains_points(xy[candidates])
+        mask[candidates[inside]] = True
+        
+    return mask.reshape(x.shape)
+
+def points_in_ellipses(x, y, ex, ey, a, b, theta, r=1.):
+    """
+    Analytic test of which points (x, y) are within at least one of the ellipses
+    of center (ex, ey), semi-axes (a*r, b*r) and angle theta (radian, counter-clockwise
+    from the x axis, sep convention).
+    Only the ellipses whose center is closer than the largest semi-axis of a point
+    are tested (KD-tree of the centers).
+
+    Return
+    ------
+    bool-array (one per point)
+    """
+    from scipy.spatial import cKDTree
+    x, y = np.atleast_1d(x).astype("float"), np.atleast_1d(y).astype("float")
+    ex, ey, a, b, theta = [np.atleast_1d(v).astype("float") for v in [ex, ey, a, b, theta]]
+    a, b = a*r, b*r
+    inside = np.zeros(len(x), dtype=bool)
+    if len(x) == 0 or len(ex) == 0:
+        return inside
+    
+    candidates = cKDTree(np.asarray([ex,ey]).T).query_ball_point(np.asarray([x,y]).T,
+                                                                np.nanmax([a,b]))
+    ipoint = np.repeat(np.arange(len(x)), [len(c_) for c_ in candidates])
+    if len(ipoint) == 0:
+        return inside
+    iell = np.concatenate(candidates).astype(int)
+    
+    dx, dy = x[ipoint]-ex[iell], y[ipoint]-ey[iell]
+    cos, sin = np.cos(theta[iell]), np.sin(theta[iell])
+    inellipse = ((dx*cos + dy*sin)/a[iell])**2 + ((-dx*sin + dy*cos)/b[iell])**2 <= 1
+    inside[ipoint[inellipse]] = True
+    return inside
 
 def polygon_to_vertices(polygon_):
     """
@@ -5,7 +5,9 @@
 import numpy as np
 
 __all__ = ["kwargs_update","kwargs_extract",
-           "load_pkl","dump_pkl"]
+           "load_pkl","dump_pkl",
+           "LRUCache","array_hash","radec_to_xyz",
+           "deg_to_chord","chord_to_deg"]
 
 
 def kwargs_update(default,**kwargs):
@@ -116,6 +118,26 @@ def hourangle_2_degree(ra_hours,dec_hours,obstime="J2000"):
 # --------------------------- #
 # - Array Tools             - #
 # --------------------------- #
+def radec_to_xyz(ra, dec):
+    """ cartesian coordinates on the unit sphere of the given ra, dec (in degree).
+
+    Returns
+    -------
+    array (N,3) [or (3,) if ra and dec are floats]
+    """
+    ra, dec = np.deg2rad(ra), np.deg2rad(dec)
+    return np.asarray([np.cos(dec)*np.cos(ra), np.cos(dec)*np.sin(ra), np.sin(dec)]).T
+
+def deg_to_chord(angle):
+    """ distance between two points of the unit sphere separated by `angle` degree
+    (to query a KD-tree of radec_to_xyz vectors) """
+    return 2*np.sin(np.deg2rad(angle)/2.)
+
+def chord_to_deg(chord):
+    """ angle (degree) between two points of the unit sphere distant by `chord`
+    (inverse of deg_to_chord) """
+    return np.rad2deg(2*np.arcsin(np.clip(np.asarray(chord)/2., 0, 1)))
+
 def shape_ajustment(X,Y,model_X,k=4,s=0,
                     verbose=False):
     """ DOC TO BE DONE
@@ -143,3 +165,142 @@ def shape_ajustment(X,Y,model_X,k=4,s=0,
         YrebinOK[0]  = Yrebin[0]
         
         return YrebinOK
+
+
+# --------------------------- #
+# - Caching Tools           - #
+# --------------------------- #
+def array_hash(*arrays, **kwargs):
+    """ hexadecimal hash (sha1) of the content of the given arrays.
+    None entries are accepted. 
+
+    **kwargs are additional (hashable by their str) values entering the hash,
+             e.g. the parameters used to derive something from the arrays.
+
+    Returns
+    -------
+    string
+    """
+    import hashlib
+    hash_ = hashlib.sha1()
+    for a in arrays:
+        if a is None:
+            hash_.update("None")
+            continue
+        a = np.ascontiguousarray(a)
+        hash_.update("%s%s"%(a.shape,a.dtype.str))
+        hash_.update(a.view(np.uint8).data)
+        
+    for k in sorted(kwargs.keys()):
+        hash_.update("%s=%s"%(k,kwargs[k]))
+    return hash_.hexdigest()
+
+class LRUCache( object ):
+    """ Least Recently Used dictionary-like cache.
+    Once full (maxsize entries or maxbytes), the least recently
+    accessed entries are dropped.
+    """
+    def __init__(self, maxsize=None, maxbytes=None, sizeof=None, on_evict=None):
+        """
+        Parameters
+        ----------
+        maxsize: [int/None] -optional-
+            Maximum number of entries. None means no limit.
+
+        maxbytes: [int/None] -optional-
+            Maximum size (in bytes, see sizeof) of the cached entries.
+            None means no limit.
+
+        sizeof: [function/None] -optional-
+            function returning the size (in bytes) of a cached value.
+            If None, the `nbytes` attribute of the value is used (0 if none).
+
+        on_evict: [function/None] -optional-
+            function called as on_evict(key, value) for every entry dropped
+            because the cache is full.
+        """
+        from collections import OrderedDict
+        self._data    = OrderedDict()
+        self._sizes   = {}
+        self.maxsize  = maxsize
+        self.maxbytes = maxbytes
+        self._sizeof  = sizeof
+        self._on_evict = on_evict
+        self.hits     = 0
+        self.misses   = 0
+
+    # - Dict-like access
+    def __contains__(self, key):
+        return key in self._data
+    
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, key):
+        value = self._data.pop(key)
+        self._data[key] = value # now the most recent
+        return value
+
+    def __setitem__(self, key, value):
+        self.pop(key)
+        size = self.sizeof(value)
+        if self.maxbytes is not None and size > self.maxbytes:
+            # - would evict everything else, and still be too big.
+            if self._on_evict is not None:
+                self._on_evict(key, value)
+            return
+        self._data[key]  = value
+        self._sizes[key] = size
+        self._evict_()
+
+    def get(self, key, default=None):
+        """ returns the cached value (and count a hit) or default (and count a miss) """
+        if key not in self._data:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return self[key]
+    
+    def pop(self, key, default=None):
+        """ remove the key (if cached) and returns its value """
+        self._sizes.pop(key, None)
+        return self._data.pop(key, default)
+    
+    def keys(self):
+        """ cached keys, from the least to the most recently used """
+        return self._data.keys()
+    
+    def clear(self, counters=True):
+        """ empty the cache (hits and misses counters are reset if counters is True) """
+        self._data.clear()
+        self._sizes.clear()
+        if counters:
+            self.hits, self.misses = 0, 0
+        
+    def sizeof(self, value):
+        """ size of the value in bytes """
+        if self._sizeof is not None:
+            return self._sizeof(value)
+        return getattr(value, "nbytes", 0)
+    
+    def _evict_(self):
+        """ drop the least recently used entries until the limits are respected """
+        while len(self._data)>0 and \
+          ((self.maxsize is not None and len(self._data) > self.maxsize) or \
+           (self.maxbytes is not None and self.nbytes > self.maxbytes)):
+            key = self._data.keys()[0]
+            value = self.pop(key)
+            if self._on_evict is not None:
+                self._on_evict(key, value)
+            
+    @property
+    def nbytes(self):
+        """ size (in bytes) of the cached values """
+        return np.sum(self._sizes.values()) if len(self._sizes)>0 else 0
+    
+    @property
+    def info(self):
+        """ dictionary of the cache status """
+        return {"hits":self.hits, "misses":self.misses,
+                "size":len(self), "nbytes":self.nbytes,
+                "maxsize":self.maxsize, "maxbytes":self.maxbytes}